@@ -74,9 +74,77 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "MyPortfolio.urls"
 
-# URL logging configuration, use '__all__' to log all urls
+# URL logging configuration, use '__all__' to log all urls, or map url prefixes
+# to the fraction of their requests to log, e.g. {"/mcp/": 1.0, "/oauth/": 0.1}
 LOGGED_URLS = ["/mcp/", "/mcp", "/oauth/", "/.well-known/", "/register/"]
 
+# Bytes of request and response bodies kept for the url log, the rest is cut
+LOGGED_BODY_MAX_SIZE = 16 * 1024
+
+# Maximum number of compiled content templates kept in memory per process
+RENDERER_TEMPLATE_CACHE_SIZE = 256
+
+# Link the local CSS and JS files of a page as minified bundles written to
+# MEDIA_ROOT/bundles/, see common.bundles
+BUNDLE_STATICS = False
+# Seconds after which bundles no page linked are deleted by prune_bundles
+BUNDLE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Widths and formats of the variants generated for image assets, see common.images.
+# Formats this Pillow can't write are left out. 0 workers, or SQLite, generates them
+# while saving.
+IMAGE_VARIANT_WIDTHS = [480, 960, 1600]
+IMAGE_VARIANT_FORMATS = ["webp", "avif"]
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_WORKERS = 2
+
+# Seconds the navbar and global static list stay cached, they are also
+# invalidated whenever a homepage section, static page or global asset changes
+SITE_CHROME_CACHE_TIMEOUT = 60 * 60
+
+# Seconds whole pages stay cached for anonymous visitors, they are also purged
+# whenever the content they show changes, 0 turns the page cache off
+PAGE_CACHE_TIMEOUT = 5 * 60
+
+# Maximum number of parsed post sublink trees kept in memory per process
+SUBLINK_CACHE_SIZE = 128
+
+# Seconds post views are buffered in memory before being written in bulk,
+# 0 writes every view right away
+VIEW_COUNT_FLUSH_INTERVAL = 10
+
+# Seconds the post list tag counts stay cached, they are also invalidated
+# whenever a post or tag changes
+POST_TAG_FACETS_CACHE_TIMEOUT = 60 * 60
+
+# Related posts ranking, see posts.related for every option
+RELATED_POSTS = {
+    "limit": 5,
+    "metric": "shared",
+}
+
+# Maximum number of posts a search returns, the most relevant ones
+SEARCH_MAX_RESULTS = 200
+
+# Default and maximum number of objects in one page of the MCP list tools
+MCP_PAGE_SIZE = 50
+MCP_MAX_PAGE_SIZE = 200
+
+# MCP tools embed asset files up to this many bytes, and up to the total per response.
+# Larger assets are returned as resource links and read in chunks of MCP_ASSET_CHUNK_SIZE.
+MCP_INLINE_ASSET_MAX_SIZE = 64 * 1024
+MCP_INLINE_ASSETS_MAX_TOTAL = 256 * 1024
+MCP_ASSET_CHUNK_SIZE = 256 * 1024
+
+# Threads that run the read-only calls of a JSON-RPC batch concurrently, 1 runs them in order
+MCP_BATCH_MAX_WORKERS = 8
+
+# Seconds between keep-alive comments on an MCP event stream while a call runs
+MCP_STREAM_KEEPALIVE = 15
+
+# Seconds a verified OAuth access token is trusted without loading it again
+OAUTH_TOKEN_CACHE_TIMEOUT = 60
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -147,6 +215,13 @@ STATIC_URL = "/static/"
 MEDIA_ROOT = get_secret_value("MEDIA_ROOT", os.path.join(BASE_DIR.parent, "media/"))
 MEDIA_URL = "/media/"
 
+# Directory the export_site command writes the static HTML pages to
+EXPORT_ROOT = get_secret_value("EXPORT_ROOT", os.path.join(BASE_DIR.parent, "export/"))
+
+# Cache lifetime of media files named by their content hash, assets under
+# assets/<hash>/ and static bundles, which never change once written
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -211,6 +286,12 @@ LOGGING = {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        # Writes from a background thread, records are dropped when it falls behind
+        "background": {
+            "class": "common.logging.BackgroundStreamHandler",
+            "formatter": "verbose",
+            "queue_size": 10000,
+        },
     },
     "root": {
         "handlers": ["console"],
@@ -237,8 +318,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        # Request logs. Records carry a common.middlewares.RequestLog as `request_log`,
+        # formatters and filters read record.request_log.request_data and
+        # .response_data where they used to read the `request` and `response` extras
         "portfolio.url": {
-            "handlers": ["console"],
+            "handlers": ["background"],
             "level": "INFO",
             "propagate": False,
         },
@@ -20,3 +20,14 @@ DATABASES = {
         "PORT": get_secret_value("DB_PORT"),
     }
 }
+
+BUNDLE_STATICS = True
+
+# Shared by all gunicorn workers, so cached site data is built only once
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": get_secret_value("CACHE_LOCATION", "/tmp/myportfolio-cache"),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+}
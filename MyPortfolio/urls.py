@@ -20,10 +20,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 from oauth2_provider import urls as oauth2_urls
 
+from common.views import serve_media
+
 from pages.views import HomePageView, StaticPageView
 from posts.views import PostDetailView, PostListView
 from django.urls import re_path
 from mcp.views import (
+    AsyncMcpView,
     McpView,
     OAuthProtectedResourceMetadataView,
     OAuthAuthorizationServerMetadataView,
@@ -39,6 +42,7 @@ urlpatterns = [
     path("page/<str:permalink>", StaticPageView.as_view(), name="static-page"),
     path("oauth/", include(oauth2_urls)),
     re_path(r"^mcp/?$", McpView.as_view(), name="mcp"),
+    re_path(r"^mcp/stream/?$", AsyncMcpView.as_view(), name="mcp-stream"),
     path(
         ".well-known/oauth-authorization-server",
         OAuthAuthorizationServerMetadataView.as_view(),
@@ -57,4 +61,6 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(
+        settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT
+    )
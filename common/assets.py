@@ -0,0 +1,116 @@
+from django.db.models import Q
+
+from .images import ResponsiveImage, get_image_format
+from .models import SiteAsset
+
+
+class AssetContextResolver:
+    """
+    Loads the site assets of a whole batch of objects with one query.
+
+    Global assets are shared by every object, while assets linked to a post, page or
+    homepage section only belong to that object. Loaded assets are kept for the lifetime
+    of the resolver, so views hold one per request and every object rendered in that
+    request shares the same asset maps.
+    """
+
+    owner_fields = ("post", "page", "homepage_section")
+
+    def __init__(self):
+        self._global_assets = None
+        self._owned_assets = {}
+
+    @classmethod
+    def get_owner_key(cls, obj):
+        """Return the (SiteAsset field name, owner id) pair identifying obj's assets."""
+        for field_name in cls.owner_fields:
+            field = SiteAsset._meta.get_field(field_name)
+            if isinstance(obj, field.related_model):
+                return (field_name, obj.pk)
+
+        return None
+
+    def prefetch(self, objects):
+        """Load the assets of every object that has not been loaded yet."""
+        owner_ids = {}
+        for obj in objects:
+            key = self.get_owner_key(obj)
+            if key is not None and key not in self._owned_assets:
+                owner_ids.setdefault(key[0], set()).add(key[1])
+
+        query = Q()
+        if self._global_assets is None:
+            query |= Q(
+                post__isnull=True, page__isnull=True, homepage_section__isnull=True
+            )
+        for field_name, ids in owner_ids.items():
+            query |= Q(**{f"{field_name}__in": ids})
+
+        if not query:
+            return
+
+        if self._global_assets is None:
+            self._global_assets = []
+        for field_name, ids in owner_ids.items():
+            for owner_id in ids:
+                self._owned_assets[(field_name, owner_id)] = []
+
+        for asset in SiteAsset.objects.filter(query, is_active=True).order_by("pk"):
+            key = self._get_asset_owner_key(asset)
+            if key is None:
+                self._global_assets.append(asset)
+            elif key in self._owned_assets:
+                self._owned_assets[key].append(asset)
+
+    def _get_asset_owner_key(self, asset):
+        for field_name in self.owner_fields:
+            owner_id = getattr(asset, f"{field_name}_id")
+            if owner_id is not None:
+                return (field_name, owner_id)
+
+        return None
+
+    def get_global_assets(self):
+        self.prefetch([])
+        return list(self._global_assets)
+
+    def get_owned_assets(self, obj):
+        key = self.get_owner_key(obj)
+        if key is None:
+            return []
+
+        self.prefetch([obj])
+        return list(self._owned_assets[key])
+
+    @staticmethod
+    def get_context_value(asset):
+        # Images come with their responsive variants
+        if get_image_format(asset.file.name):
+            return ResponsiveImage(asset.file, asset.variants)
+        return asset.file
+
+    def get_context(self, obj):
+        """Template context for rendering obj's content: asset key to file."""
+        context = {
+            asset.key: self.get_context_value(asset)
+            for asset in self.get_global_assets()
+        }
+
+        # The object's own media assets win over global assets with the same key
+        for asset in self.get_owned_assets(obj):
+            if not asset.is_static:
+                context[asset.key] = self.get_context_value(asset)
+
+        return context
+
+    def get_static_urls(self, objects):
+        """URLs of the CSS/JS assets linked to the given objects, in order."""
+        objects = list(objects)
+        self.prefetch(objects)
+
+        return [
+            asset.file.url
+            for obj in objects
+            for asset in self.get_owned_assets(obj)
+            if asset.is_static
+        ]
@@ -0,0 +1,262 @@
+"""
+Benchmark harness for the public page views and the MCP tools.
+
+Generates a synthetic site, then measures latency percentiles, database queries and
+memory allocations of every view and MCP tool. Used by the `benchmark` management
+command, which runs it against a throwaway database and prints the results as JSON.
+"""
+
+import base64
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from common.models import SiteAsset
+from pages.models import HomePageSection, StaticPage
+from posts.models import PostDetail, PostTag
+from posts.related import refresh_related_posts
+from posts.search import index_posts
+
+# A 1x1 transparent png
+PNG_CONTENT = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+POST_CONTENT = """
+<h2>Section {n}</h2>
+<p>{{{{ banner.url }}}} Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>
+<h3>Details</h3>
+<p>{{% now "Y" %}} Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.</p>
+"""
+
+
+def generate_site(posts=100, tags=10, assets=50, sections=6, pages=3, seed=0):
+    """Create a synthetic site and return the names used to address its objects."""
+    rng = random.Random(seed)
+
+    tag_objects = PostTag.objects.bulk_create(
+        PostTag(label=f"tag{n}") for n in range(tags)
+    )
+    post_objects = PostDetail.objects.bulk_create(
+        PostDetail(
+            permalink=f"post_{n}",
+            heading=f"Post {n}",
+            introduction=f"<p>Introduction of post {n}</p>",
+            content="".join(POST_CONTENT.format(n=part) for part in range(20)),
+            requires_rendering=True,
+            is_published=n % 10 != 0,
+            feature=rng.randint(0, 3),
+        )
+        for n in range(posts)
+    )
+    PostDetail.tags.through.objects.bulk_create(
+        PostDetail.tags.through(postdetail_id=post.pk, posttag_id=tag.pk)
+        for post in post_objects
+        for tag in rng.sample(tag_objects, min(len(tag_objects), rng.randint(1, 3)))
+    )
+    page_objects = StaticPage.objects.bulk_create(
+        StaticPage(
+            permalink=f"page_{n}",
+            heading=f"Page {n}",
+            content=POST_CONTENT.format(n=n),
+            requires_rendering=True,
+            is_published=True,
+            navbar_title=f"page{n}",
+        )
+        for n in range(pages)
+    )
+    section_objects = HomePageSection.objects.bulk_create(
+        HomePageSection(
+            name=f"section{n}",
+            content=POST_CONTENT.format(n=n),
+            requires_rendering=True,
+            serial=n,
+            navbar_title=f"section{n}" if n % 2 else None,
+        )
+        for n in range(sections)
+    )
+
+    owners = [{}] + [
+        {field_name: obj}
+        for field_name, objects in (
+            ("post", post_objects),
+            ("page", page_objects),
+            ("homepage_section", section_objects),
+        )
+        for obj in objects
+    ]
+    asset_objects = []
+    for n in range(assets):
+        owner = rng.choice(owners)
+        if n % 2:
+            content = ContentFile(f".asset-{n} {{}}".encode(), name=f"asset{n}.css")
+            asset = SiteAsset.objects.create(key=f"asset{n}", file=content, **owner)
+        else:
+            content = ContentFile(PNG_CONTENT, name=f"banner{n}.png")
+            asset = SiteAsset.objects.create(
+                key="banner", file=content, is_static=False, **owner
+            )
+        asset_objects.append(asset)
+
+    refresh_related_posts()
+    index_posts()
+
+    return {
+        "post": post_objects[1].permalink,
+        "page": page_objects[0].permalink if page_objects else None,
+        "section": section_objects[0].name if section_objects else None,
+        "tag": tag_objects[0].pk if tag_objects else None,
+        # Matches every post, so the search ranks the whole index
+        "query": 'lorem "magna aliqua"',
+        "asset": asset_objects[0].file.name if asset_objects else None,
+    }
+
+
+def get_view_scenarios(site):
+    client = Client()
+
+    def get(url):
+        return lambda n: client.get(url)
+
+    scenarios = {
+        "HomePageView": get(reverse("home")),
+        "PostListView": get(reverse("post-list")),
+        "PostListView (filtered)": get(
+            f"{reverse('post-list')}?sort=viewed&tags={site['tag']}"
+        ),
+        "PostDetailView": get(reverse("post-detail", args=[site["post"]])),
+    }
+    if site["page"]:
+        scenarios["StaticPageView"] = get(reverse("static-page", args=[site["page"]]))
+
+    return scenarios
+
+
+def get_tool_scenarios(site):
+    """Arguments for every MCP tool, by call number so write tools don't collide."""
+    from mcp.registry import registry
+
+    tags = '[["benchmark", "white", "grey"]]'
+    arguments = {
+        "create_post": lambda n: {
+            "permalink": f"benchmark_post_{n}",
+            "heading": "Benchmark",
+            "content": POST_CONTENT.format(n=n),
+            "tags": tags,
+        },
+        "get_post": lambda n: {"permalink": site["post"]},
+        "list_posts": lambda n: {},
+        "search_posts": lambda n: {"query": site["query"]},
+        "update_post": lambda n: {"permalink": site["post"], "heading": f"Post {n}"},
+        "create_page": lambda n: {
+            "permalink": f"benchmark_page_{n}",
+            "heading": "Benchmark",
+            "content": POST_CONTENT.format(n=n),
+        },
+        "get_page": lambda n: {"permalink": site["page"]},
+        "list_pages": lambda n: {},
+        "update_page": lambda n: {"permalink": site["page"], "heading": f"Page {n}"},
+        "create_homepage_section": lambda n: {
+            "name": f"benchmark{n}",
+            "content": POST_CONTENT.format(n=n),
+        },
+        "get_homepage_section": lambda n: {"name": site["section"]},
+        "list_homepage_sections": lambda n: {},
+        "update_homepage_section": lambda n: {"name": site["section"], "serial": n},
+        "create_site_asset": lambda n: {
+            "filename": f"benchmark{n}.css",
+            "file_content": ".benchmark {}",
+        },
+        "delete_site_asset": lambda n: {"filename": f"benchmark{n}.css"},
+        "read_site_asset": lambda n: {"uri": site["asset"]},
+    }
+
+    container = registry.tools_container
+    scenarios = {}
+    for name in container.registrations:
+        if name in arguments:
+            scenarios[f"mcp.{name}"] = lambda n, name=name: container.call(
+                name, **arguments[name](n)
+            )
+        else:
+            scenarios[f"mcp.{name}"] = None
+
+    return scenarios
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def measure(func, iterations=20, warmup=2):
+    """Latency percentiles in ms, queries and allocated KiB of one call to func(n)."""
+    for n in range(warmup):
+        func(n)
+
+    durations = []
+    query_counts = []
+    for n in range(warmup, warmup + iterations):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func(n)
+            durations.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(queries))
+
+    # Traced separately, tracing slows calls down
+    tracemalloc.start()
+    try:
+        func(warmup + iterations)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "latency_ms": {
+            "min": round(min(durations), 3),
+            "p50": round(percentile(durations, 50), 3),
+            "p90": round(percentile(durations, 90), 3),
+            "p99": round(percentile(durations, 99), 3),
+            "max": round(max(durations), 3),
+            "mean": round(statistics.fmean(durations), 3),
+        },
+        "queries": {
+            "min": min(query_counts),
+            "max": max(query_counts),
+            "median": statistics.median(query_counts),
+        },
+        "allocations_kib": {
+            "retained": round(current / 1024, 1),
+            "peak": round(peak / 1024, 1),
+        },
+    }
+
+
+def run_benchmarks(site, iterations=20, warmup=2, only=None):
+    scenarios = {**get_view_scenarios(site), **get_tool_scenarios(site)}
+
+    results = {}
+    for name, func in scenarios.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+
+        if func is None:
+            results[name] = {"skipped": "No benchmark arguments defined for this tool"}
+            continue
+
+        try:
+            results[name] = measure(func, iterations=iterations, warmup=warmup)
+        except Exception as e:
+            # Keep benchmarking the rest, a failing target is part of the report
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    return results
@@ -0,0 +1,266 @@
+"""
+Bundling of the site's own CSS and JS files linked on a page.
+
+Consecutive static files of the same type are concatenated, minified and written once
+to MEDIA_ROOT/bundles/ under the hash of their content, so a page links one file per
+run instead of one per file. Uploaded asset files, remote files, CSS using @import and
+strict mode scripts are linked as they are: joined with other files, an error or a
+"use strict" in one of them would change how the others run. The order of every file
+is kept. A bundle is looked up by the paths, modification times and sizes of its files,
+so it's only rebuilt when one changes.
+
+Bundles no page used for BUNDLE_MAX_AGE are deleted by the prune_bundles command.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from posixpath import join as urljoin
+from typing import List
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from jsmin import jsmin
+
+from .static import SiteStatic
+from .utils import LRUCache
+
+BUNDLE_DIR = "bundles"
+
+BUNDLE_NAME_RE = re.compile(rf"{BUNDLE_DIR}/[0-9a-f]{{16}}\.(?:css|js)")
+# Seconds between two checks that a bundle a process links is still on disk
+BUNDLE_CHECK_INTERVAL = 60 * 60
+
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+# Strings and url() are kept as they are, comments are dropped
+CSS_TOKEN_RE = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\(\s*(?:"(?:\\.|[^"\\])*"|"""
+    r"""'(?:\\.|[^'\\])*'|[^)]*)\s*\))|(/\*.*?\*/)""",
+    re.DOTALL | re.IGNORECASE,
+)
+CSS_SPACE_RE = re.compile(r"\s+")
+CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,])\s*")
+JS_STRICT_RE = re.compile(
+    r"""^(?:\s|//[^\n]*|/\*.*?\*/)*(['"])use strict\1""", re.DOTALL
+)
+
+# url -> local path, file signature -> can't be bundled,
+# input signatures -> (bundle url, path, time it was last seen on disk)
+_paths = LRUCache(maxsize=1024)
+_unbundleable = LRUCache(maxsize=1024)
+_bundles = LRUCache(maxsize=256)
+
+
+def get_local_path(static: SiteStatic):
+    """Path of a static or media file on disk, None for remote or missing files."""
+    path = _paths.get(static.url)
+    if path is not None:
+        return path
+
+    url = unquote(static.url)
+    if url.startswith(settings.MEDIA_URL):
+        path = default_storage.path(url[len(settings.MEDIA_URL) :])
+    elif url.startswith(settings.STATIC_URL):
+        name = url[len(settings.STATIC_URL) :]
+        path = finders.find(name) or os.path.join(settings.STATIC_ROOT, name)
+    else:
+        return None
+
+    if not os.path.isfile(path):
+        return None
+
+    _paths.set(static.url, path)
+    return path
+
+
+def _minify_css_code(css):
+    css = CSS_SPACE_RE.sub(" ", css)
+    return CSS_PUNCTUATION_RE.sub(r"\1", css)
+
+
+def minify_css(css):
+    parts, code, position = [], [], 0
+    for match in CSS_TOKEN_RE.finditer(css):
+        code.append(css[position : match.start()])
+        position = match.end()
+        if match.group(1):
+            # A string or url() is copied as it is
+            parts.append(_minify_css_code("".join(code)))
+            parts.append(match.group(1))
+            code = []
+    code.append(css[position:])
+    parts.append(_minify_css_code("".join(code)))
+    return "".join(parts).strip()
+
+
+def rebase_css_urls(css, url):
+    """Make relative url() references of a css file work from the bundle location."""
+    base = url.rsplit("/", 1)[0]
+
+    def rebase(match):
+        quote, target = match.groups()
+        if target.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        return f"url({quote}{os.path.normpath(urljoin(base, target))}{quote})"
+
+    return CSS_URL_RE.sub(rebase, css)
+
+
+def build_bundle(statics: List[SiteStatic], paths, file_type):
+    """Concatenate and minify the files, returning the url of the written bundle."""
+    parts = []
+    for static, path in zip(statics, paths):
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+
+        if file_type == "css":
+            parts.append(minify_css(rebase_css_urls(content, static.url)))
+        else:
+            try:
+                parts.append(jsmin(content))
+            except Exception:
+                parts.append(content)
+
+    # Scripts without a trailing semicolon must not run into the next file
+    separator = "\n" if file_type == "css" else ";\n"
+    content = separator.join(parts).encode("utf-8")
+
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    name = f"{BUNDLE_DIR}/{digest}.{file_type}"
+    path = default_storage.path(name)
+    if os.path.exists(path):
+        # Used again, so not pruned
+        os.utime(path)
+    else:
+        # Written to a temporary file first, so other workers never serve half a file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    return default_storage.url(name)
+
+
+def is_unbundleable(path, file_type):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    if file_type == "css":
+        # @import rules are only valid at the start of a stylesheet
+        return "@import" in content
+    # Strict mode would apply to every script after it
+    return bool(JS_STRICT_RE.match(content))
+
+
+def get_file_signature(static: SiteStatic):
+    """(path, modification time, size) of a file that can be bundled, or None."""
+    # Only the site's own files, uploaded assets are loaded on their own
+    if not unquote(static.url).startswith(settings.STATIC_URL):
+        return None
+
+    path = get_local_path(static)
+    if path is None:
+        return None
+
+    stat = os.stat(path)
+    signature = (path, stat.st_mtime_ns, stat.st_size)
+    unbundleable = _unbundleable.get(signature)
+    if unbundleable is None:
+        unbundleable = is_unbundleable(path, static.type)
+        _unbundleable.set(signature, unbundleable)
+    if unbundleable:
+        return None
+
+    return signature
+
+
+def get_bundle(statics: List[SiteStatic], signatures, file_type):
+    key = (file_type, *signatures)
+    bundle = _bundles.get(key)
+    now = time.time()
+    if bundle is not None and now - bundle[2] > BUNDLE_CHECK_INTERVAL:
+        # Marked as used, or built again when it was pruned
+        try:
+            os.utime(bundle[1])
+        except FileNotFoundError:
+            bundle = None
+        else:
+            bundle = (bundle[0], bundle[1], now)
+            _bundles.set(key, bundle)
+
+    if bundle is None:
+        paths = [signature[0] for signature in signatures]
+        url = build_bundle(statics, paths, file_type)
+        path = default_storage.path(url[len(settings.MEDIA_URL) :])
+        bundle = (url, path, now)
+        _bundles.set(key, bundle)
+    return SiteStatic(bundle[0], file_type)
+
+
+def prune_bundles(max_age, keep=()):
+    """Delete the bundles not used for max_age seconds, except the names in keep.
+
+    Returns the number of deleted bundles.
+    """
+    directory = default_storage.path(BUNDLE_DIR)
+    if not os.path.isdir(directory):
+        return 0
+
+    keep = set(keep)
+    deadline = time.time() - max_age
+    count = 0
+    for entry in os.scandir(directory):
+        name = f"{BUNDLE_DIR}/{entry.name}"
+        if (
+            BUNDLE_NAME_RE.fullmatch(name)
+            and name not in keep
+            and entry.stat().st_mtime < deadline
+        ):
+            os.remove(entry.path)
+            count += 1
+    return count
+
+
+def get_bundled_static_list(statics: List[SiteStatic]) -> List[SiteStatic]:
+    """Replace runs of local files of the same type with their bundle."""
+    if not getattr(settings, "BUNDLE_STATICS", False):
+        return statics
+
+    result = []
+    run, run_signatures = [], []
+
+    def close_run():
+        if len(run) > 1:
+            try:
+                result.append(get_bundle(run, run_signatures, run[0].type))
+            except (OSError, UnicodeDecodeError):
+                result.extend(run)
+        else:
+            result.extend(run)
+        run.clear()
+        run_signatures.clear()
+
+    for file_type in ("css", "js"):
+        for static in statics:
+            if static.type != file_type:
+                continue
+
+            try:
+                signature = get_file_signature(static)
+            except OSError:
+                signature = None
+
+            if signature is None:
+                close_run()
+                result.append(static)
+            else:
+                run.append(static)
+                run_signatures.append(signature)
+        close_run()
+
+    return result
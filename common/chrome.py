@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .navbar import get_navbar_items
+from .static import get_custom_static_list
+from .versions import SITE_VERSION, get_version
+
+
+def get_site_chrome(is_homepage):
+    """
+    Navbar items and global static files shown on every page.
+
+    Both only change when a homepage section, static page or global asset is edited, so
+    they are cached under the site content version and hits need no database query.
+    """
+    key = f"site-chrome:{get_version(SITE_VERSION)}:{int(is_homepage)}"
+    chrome = cache.get(key)
+    if chrome is None:
+        chrome = {
+            "navbar_items": get_navbar_items(is_homepage),
+            "custom_statics": get_custom_static_list(),
+        }
+        cache.set(key, chrome, getattr(settings, "SITE_CHROME_CACHE_TIMEOUT", 3600))
+
+    return chrome
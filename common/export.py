@@ -0,0 +1,327 @@
+"""
+Static HTML export of the public site.
+
+Every published post and static page, the homepage and every post list page, sort and
+tag combination with results is rendered to a file that a web server can serve
+directly. A page without query parameters is written to <path>/index.html, one with
+parameters to <path>/<query>.html where the query is in the normalised form of the
+page cache, e.g. posts/page=2&sort=latest.html.
+
+manifest.json lists the exported pages with a digest of the rows each one shows.
+Exporting again only renders the pages whose digest changed since, and removes the
+files of pages that are gone. The digests are computed from the database so they
+survive cache restarts and can be compared across processes. Pages are rendered past
+the page cache and conditional GET handling, an export doesn't fill the live cache.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+import django
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from pages.models import HomePageSection, StaticPage
+from posts.models import PostDetail, PostTag, RelatedPost
+from .bundles import BUNDLE_NAME_RE
+from .models import SiteAsset
+
+MANIFEST_NAME = "manifest.json"
+# Fewer stale pages than this are rendered in this process, a pool isn't worth it
+POOL_MIN_PAGES = 50
+# View attributes switched off for the export: rendering is not a visit, and the
+# pages don't belong in the live page cache
+EXPORT_INITKWARGS = {
+    "record_views": False,
+    "use_page_cache": False,
+    "use_conditional_get": False,
+}
+
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _rows(queryset, *fields):
+    return list(queryset.order_by("pk").values_list(*fields))
+
+
+def _group_rows(queryset, key, *fields):
+    """{key: [rows]} of a queryset, reading only those fields."""
+    groups = defaultdict(list)
+    for row in queryset.order_by("pk").values_list(key, *fields):
+        groups[row[0]].append(row[1:])
+    return groups
+
+
+def get_page_digests():
+    """
+    The URL of every exported page with a digest of the rows it shows.
+
+    Only keys, modification times and asset files are read, never content columns. A
+    detail page depends on its object, its assets and tags, and for a post on its
+    related posts; the list pages on the set of published posts. All of them depend on
+    the navbar and the global assets. View counts are not included, exported pages show
+    the counts they were rendered with, only the viewed order of the list changes them.
+    """
+    asset_fields = ("pk", "file", "is_active", "is_static", "key", "variants")
+    chrome = _digest(
+        _rows(HomePageSection.objects.all(), "pk", "navbar_title"),
+        _rows(
+            StaticPage.objects.all(),
+            "pk",
+            "permalink",
+            "navbar_title",
+            "navbar_serial",
+            "is_published",
+        ),
+        _rows(
+            SiteAsset.objects.filter(
+                post__isnull=True, page__isnull=True, homepage_section__isnull=True
+            ),
+            *asset_fields,
+        ),
+    )
+
+    digests = {
+        reverse("home"): _digest(
+            chrome,
+            _rows(HomePageSection.objects.all(), "pk", "modified"),
+            _rows(
+                SiteAsset.objects.filter(homepage_section__isnull=False),
+                "homepage_section",
+                *asset_fields,
+            ),
+        )
+    }
+
+    page_assets = _group_rows(
+        SiteAsset.objects.filter(page__isnull=False), "page", *asset_fields
+    )
+    for pk, permalink, modified in _rows(
+        StaticPage.objects.filter(is_published=True), "pk", "permalink", "modified"
+    ):
+        digests[reverse("static-page", args=[permalink])] = _digest(
+            chrome, pk, modified, page_assets[pk]
+        )
+
+    posts = {
+        pk: (modified, is_published)
+        for pk, modified, is_published in _rows(
+            PostDetail.objects.all(), "pk", "modified", "is_published"
+        )
+    }
+    tags = dict(_rows(PostTag.objects.all(), "pk", "modified"))
+    post_tags = _group_rows(
+        PostDetail.tags.through.objects.all(), "postdetail", "posttag"
+    )
+    post_assets = _group_rows(
+        SiteAsset.objects.filter(post__isnull=False), "post", *asset_fields
+    )
+    related = _group_rows(RelatedPost.objects.all(), "post", "related", "rank")
+
+    def get_post_rows(pk):
+        return posts[pk], [(tag, tags[tag]) for (tag,) in post_tags.get(pk, [])]
+
+    for pk, permalink in _rows(
+        PostDetail.objects.filter(is_published=True), "pk", "permalink"
+    ):
+        digests[reverse("post-detail", args=[permalink])] = _digest(
+            chrome,
+            get_post_rows(pk),
+            post_assets[pk],
+            [(rank, get_post_rows(other)) for other, rank in related[pk]],
+        )
+
+    post_set = _digest(chrome, posts, tags, post_tags)
+    viewed_order = _digest(
+        post_set,
+        list(
+            PostDetail.objects.filter(is_published=True)
+            .order_by("-view_count", "-pk")
+            .values_list("pk", flat=True)
+        ),
+    )
+    for url in get_post_list_urls():
+        digests[url] = viewed_order if "sort=viewed" in url else post_set
+    return digests
+
+
+def get_post_list_urls():
+    """URLs of every post list page, sort and tag combination with results."""
+    from posts.views import PostListView
+
+    sorts = [None, "featured", "latest", "oldest", "viewed"]
+    published = PostDetail.objects.filter(is_published=True)
+    counts = {None: published.count()}
+    for tag_id in PostTag.objects.values_list("pk", flat=True):
+        count = published.filter(tags__id=tag_id).count()
+        if count:
+            counts[str(tag_id)] = count
+
+    urls = []
+    list_url = reverse("post-list")
+    for tags, count in counts.items():
+        pages = max(1, math.ceil(count / PostListView.paginate_by))
+        for sort in sorts:
+            for page in range(1, pages + 1):
+                params = {
+                    "page": page if page > 1 else None,
+                    "sort": sort,
+                    "tags": tags,
+                }
+                query = urlencode({k: v for k, v in params.items() if v is not None})
+                urls.append(f"{list_url}?{query}" if query else list_url)
+    return urls
+
+
+def get_file_name(url):
+    path, _, query = url.partition("?")
+    path = path.strip("/")
+    name = f"{query}.html" if query else "index.html"
+    return f"{path}/{name}" if path else name
+
+
+def write_file(path, content):
+    # Written to a temporary file first, the web server never serves half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def render_page(url, output_dir, digest):
+    """Render a page to its file, returning its manifest entry."""
+    split_url = urlsplit(url)
+    match = resolve(split_url.path)
+    view_class = match.func.view_class
+    initkwargs = {
+        name: value
+        for name, value in EXPORT_INITKWARGS.items()
+        if hasattr(view_class, name)
+    }
+
+    request = RequestFactory().get(url)
+    response = view_class.as_view(**initkwargs)(request, *match.args, **match.kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if response.status_code != 200:
+        raise ValueError(f"{url} responded with {response.status_code}")
+
+    file_name = get_file_name(url)
+    write_file(os.path.join(output_dir, file_name), response.content)
+    return {
+        "file": file_name,
+        "sha256": hashlib.sha256(response.content).hexdigest(),
+        "digest": digest,
+        # Kept by prune_bundles while exported pages link them
+        "bundles": sorted(set(BUNDLE_NAME_RE.findall(response.content.decode()))),
+    }
+
+
+def _init_worker():
+    django.setup()
+
+
+def _render_pages(digests, output_dir, workers):
+    """Render the pages of {url: digest}, on a pool of workers if there are many."""
+    if workers <= 1 or len(digests) < POOL_MIN_PAGES:
+        return {
+            url: render_page(url, output_dir, digest) for url, digest in digests.items()
+        }
+
+    # Every worker opens its own database connection
+    connections.close_all()
+    urls = list(digests)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        entries = pool.map(
+            render_page,
+            urls,
+            [output_dir] * len(urls),
+            digests.values(),
+            chunksize=8,
+        )
+        return dict(zip(urls, entries))
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_exported_bundles(output_dir):
+    manifest = load_manifest(output_dir) or {"pages": {}}
+    return {
+        name
+        for entry in manifest["pages"].values()
+        for name in entry.get("bundles", [])
+    }
+
+
+def export_site(output_dir, full=False, workers=1):
+    """Export the site to output_dir, returning the counts of rendered, kept and
+    removed pages."""
+    previous = load_manifest(output_dir)
+    full = full or previous is None
+    previous_pages = previous["pages"] if previous else {}
+
+    pages, stale = {}, {}
+    for url, digest in get_page_digests().items():
+        entry = previous_pages.get(url)
+        if (
+            full
+            or entry is None
+            or entry.get("digest") != digest
+            or not os.path.exists(os.path.join(output_dir, entry["file"]))
+        ):
+            stale[url] = digest
+        else:
+            pages[url] = entry
+
+    pages.update(_render_pages(stale, output_dir, workers))
+
+    removed = 0
+    for url, entry in previous_pages.items():
+        if url not in pages:
+            path = os.path.join(output_dir, entry["file"])
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+            # Drop the directories left empty, e.g. post/<permalink>/, never the
+            # output directory or anything above it
+            directory = os.path.dirname(path)
+            while os.path.abspath(directory) != os.path.abspath(output_dir):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    manifest = {
+        "generated": datetime.now(timezone.utc).isoformat(),
+        "pages": pages,
+    }
+    write_file(
+        os.path.join(output_dir, MANIFEST_NAME),
+        json.dumps(manifest, indent=2).encode("utf-8"),
+    )
+    return {"rendered": len(stale), "kept": len(pages) - len(stale), "removed": removed}
@@ -0,0 +1,293 @@
+"""
+Responsive variants of image site assets.
+
+When an image asset is saved, smaller copies at IMAGE_VARIANT_WIDTHS and copies in the
+IMAGE_VARIANT_FORMATS (WebP, AVIF) are generated on a bounded pool of background
+threads, and stored next to the original under its content hash directory, so they are
+as immutable as the original. Their names and sizes are kept in SiteAsset.variants.
+
+In the content context an image asset is a ResponsiveImage, which works like the file
+({{ banner.url }}) and adds {{ banner.srcset }}, {{ banner.webp.url }},
+{{ banner.webp.srcset }} and so on. Until the variants exist, srcset is the original.
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, connections
+from PIL import Image, ImageOps, features
+
+from .models import SiteAsset
+
+logger = logging.getLogger(__name__)
+
+# Extension -> Pillow format of the images variants are made for
+IMAGE_FORMATS = {
+    "jpg": "JPEG",
+    "jpeg": "JPEG",
+    "png": "PNG",
+    "webp": "WEBP",
+}
+# Format -> (extension, media type) of the generated files
+VARIANT_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+    "AVIF": ("avif", "image/avif"),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+# Assets with a generation queued or running, so saves in a row only queue one
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def get_image_format(name):
+    extension = os.path.splitext(name)[1][1:].lower()
+    return IMAGE_FORMATS.get(extension)
+
+
+def get_variant_formats():
+    """The Pillow formats of the configured variant formats this Pillow can write."""
+    return [
+        name.upper()
+        for name in settings.IMAGE_VARIANT_FORMATS
+        if features.check(name.lower())
+    ]
+
+
+def encode_image(image, image_format):
+    output = io.BytesIO()
+    if image_format == "JPEG":
+        image.convert("RGB").save(
+            output, "JPEG", quality=settings.IMAGE_VARIANT_QUALITY, optimize=True
+        )
+    elif image_format == "PNG":
+        image.save(output, "PNG", optimize=True)
+    else:
+        image.save(output, image_format, quality=settings.IMAGE_VARIANT_QUALITY)
+    return output.getvalue()
+
+
+def build_variants(file, image_format):
+    """Write the variants of an image file, returning the SiteAsset.variants data."""
+    with file.open("rb") as f:
+        image = Image.open(f)
+        image.load()
+    # Phones store the orientation apart from the pixels
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+    width, height = image.size
+    stem = os.path.splitext(file.name)[0]
+    widths = [w for w in sorted(set(settings.IMAGE_VARIANT_WIDTHS)) if w < width]
+
+    files = []
+    for variant_width in widths + [width]:
+        resized = image
+        if variant_width < width:
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image.resize(
+                (variant_width, variant_height), Image.Resampling.LANCZOS
+            )
+
+        # The original is already there at full width
+        formats = get_variant_formats()
+        if variant_width < width and image_format not in formats:
+            formats.insert(0, image_format)
+
+        for variant_format in formats:
+            if variant_format == image_format and variant_width == width:
+                continue
+            extension = VARIANT_FORMATS[variant_format][0]
+            name = f"{stem}-{variant_width}w.{extension}"
+            name = file.storage.save(
+                name, ContentFile(encode_image(resized, variant_format))
+            )
+            files.append(
+                {
+                    "name": name,
+                    "width": resized.width,
+                    "height": resized.height,
+                    "format": variant_format,
+                }
+            )
+
+    return {"source": file.name, "width": width, "height": height, "files": files}
+
+
+def delete_variants(variants, storage):
+    """Delete variant files no other asset of the same source uses."""
+    source = variants.get("source")
+    if not source or SiteAsset.objects.filter(file=source).exists():
+        return
+    for variant in variants.get("files", []):
+        storage.delete(variant["name"])
+
+
+def needs_variants(asset):
+    return bool(
+        asset.file
+        and get_image_format(asset.file.name)
+        and asset.variants.get("source") != asset.file.name
+    )
+
+
+def generate_variants(asset_id):
+    """Generate the variants of an asset's current file, if it still lacks them."""
+    asset = SiteAsset.objects.filter(pk=asset_id).first()
+    if asset is None or not needs_variants(asset):
+        return
+
+    # The same content uploaded for another asset already has its variants
+    variants = (
+        SiteAsset.objects.filter(variants__source=asset.file.name)
+        .values_list("variants", flat=True)
+        .first()
+    )
+    if variants is None:
+        try:
+            variants = build_variants(asset.file, get_image_format(asset.file.name))
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning(
+                "Unable to generate the variants of asset %s.", asset_id, exc_info=True
+            )
+            return
+
+    previous = asset.variants
+    asset.variants = variants
+    # Saved through the model so the pages showing the asset are refreshed
+    asset.save(update_fields=["variants"])
+    if previous:
+        delete_variants(previous, asset.file.storage)
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_WORKERS,
+                    thread_name_prefix="image-variants",
+                )
+    return _executor
+
+
+def _generate_in_thread(asset_id):
+    with _pending_lock:
+        _pending.discard(asset_id)
+    try:
+        generate_variants(asset_id)
+    except Exception:
+        logger.exception("Generating the variants of asset %s failed.", asset_id)
+    finally:
+        # Pool threads outlive the job, don't leave its connection open
+        connections.close_all()
+
+
+def schedule_variants(asset_id):
+    """Generate the variants of an asset on the pool, or right away without workers."""
+    # SQLite has a single writer, pool threads would lock out the request thread
+    if settings.IMAGE_VARIANT_WORKERS <= 0 or connection.vendor == "sqlite":
+        generate_variants(asset_id)
+        return
+
+    with _pending_lock:
+        if asset_id in _pending:
+            return
+        _pending.add(asset_id)
+    get_executor().submit(_generate_in_thread, asset_id)
+
+
+class ImageSource:
+    """The variants of an image in one format, for a <source> or <img> tag."""
+
+    def __init__(self, storage, files, media_type):
+        self._storage = storage
+        self.files = sorted(files, key=lambda variant: variant["width"])
+        self.type = media_type
+
+    @property
+    def url(self):
+        """URL of the largest variant."""
+        return self._storage.url(self.files[-1]["name"])
+
+    @property
+    def srcset(self):
+        return ", ".join(
+            f"{self._storage.url(variant['name'])} {variant['width']}w"
+            for variant in self.files
+        )
+
+    def __str__(self):
+        return self.url
+
+
+class ResponsiveImage:
+    """An image asset file with its variants, used like the file in templates."""
+
+    def __init__(self, file, variants):
+        self.file = file
+        # Variants of an earlier file of the asset don't apply
+        if variants.get("source") != file.name:
+            variants = {}
+        self.variants = variants
+
+    def __getattr__(self, name):
+        # Only called for what ResponsiveImage lacks, the rest is the file's
+        if name == "file":
+            raise AttributeError(name)
+        return getattr(self.file, name)
+
+    def __str__(self):
+        return str(self.file)
+
+    @property
+    def fingerprint(self):
+        """What a rendering using this image depends on."""
+        names = [variant["name"] for variant in self.variants.get("files", [])]
+        return "|".join([self.file.name, *names])
+
+    @property
+    def width(self):
+        return self.variants.get("width")
+
+    @property
+    def height(self):
+        return self.variants.get("height")
+
+    def get_source(self, image_format):
+        files = [
+            variant
+            for variant in self.variants.get("files", [])
+            if variant["format"] == image_format
+        ]
+        if image_format == get_image_format(self.file.name) and self.width:
+            # The original is the largest of its own format
+            files.append({"name": self.file.name, "width": self.width})
+        if not files:
+            return None
+        return ImageSource(self.file.storage, files, VARIANT_FORMATS[image_format][1])
+
+    @property
+    def srcset(self):
+        """srcset of the original format, the original alone until variants exist."""
+        source = self.get_source(get_image_format(self.file.name))
+        return source.srcset if source else self.file.url
+
+    @property
+    def webp(self):
+        return self.get_source("WEBP")
+
+    @property
+    def avif(self):
+        return self.get_source("AVIF")
@@ -0,0 +1,78 @@
+"""
+Logging handlers that keep logging I/O out of the request thread.
+"""
+
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """
+    A StreamHandler whose records are formatted and written by a background thread.
+
+    Emitting only puts the record on a bounded queue, so requests don't wait on the
+    stream, and messages with lazy arguments are only built by the background thread.
+    When the queue is full the record is dropped rather than blocking the request.
+
+    Configure it like a StreamHandler:
+    "handlers": {
+        "background": {
+            "class": "common.logging.BackgroundStreamHandler",
+            "formatter": "verbose",
+            "queue_size": 10000,
+        },
+    }
+    """
+
+    is_console = True
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._listener_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # The record stays in this process, the listener thread formats it
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        # Worker processes forked from a parent need their own thread
+        if self._pid == os.getpid():
+            return
+
+        with self._listener_lock:
+            if self._pid != os.getpid():
+                self._listener = QueueListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def flush(self):
+        """Wait until the queued records are written."""
+        if self._pid == os.getpid():
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        if self._pid == os.getpid():
+            # Writes the queued records before stopping
+            self._listener.stop()
+            self._pid = None
+        self.target.close()
+        super().close()
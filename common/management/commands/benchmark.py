@@ -0,0 +1,113 @@
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from common.benchmark import generate_site, run_benchmarks
+from posts.viewcounts import view_counts
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the page views and MCP tools against a throwaway database "
+        "filled with a synthetic site, and print the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100)
+        parser.add_argument("--tags", type=int, default=10)
+        parser.add_argument("--assets", type=int, default=50)
+        parser.add_argument("--sections", type=int, default=6)
+        parser.add_argument("--pages", type=int, default=3)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Only run benchmarks whose name contains this text, can be repeated.",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Run with a dummy cache backend to measure uncached requests.",
+        )
+        parser.add_argument("--output", help="Write the JSON to this file.")
+
+    def handle(self, *args, **options):
+        overrides = {
+            "MEDIA_ROOT": tempfile.mkdtemp(),
+            "ALLOWED_HOSTS": ["*"],
+            # Flushed once at the end, the worker thread must not outlive the database
+            "VIEW_COUNT_FLUSH_INTERVAL": 24 * 60 * 60,
+            # Variants are generated while saving, no thread writes during the timings
+            "IMAGE_VARIANT_WORKERS": 0,
+        }
+        if options["no_cache"]:
+            overrides["CACHES"] = {
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+
+        sizes = {
+            name: options[name]
+            for name in ("posts", "tags", "assets", "sections", "pages")
+        }
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**overrides):
+                site = generate_site(seed=options["seed"], **sizes)
+                results = run_benchmarks(
+                    site,
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                    only=options["only"],
+                )
+        finally:
+            view_counts.flush()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "metadata": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_commit": get_git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "cache": not options["no_cache"],
+                "iterations": options["iterations"],
+                "warmup": options["warmup"],
+                "seed": options["seed"],
+                "sizes": sizes,
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.stderr.write(f"Benchmark results written to {options['output']}")
+        else:
+            self.stdout.write(output)
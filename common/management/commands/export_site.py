@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.export import export_site
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public pages of the site to static HTML files with a manifest, "
+        "only rendering the pages whose content changed since the last export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=settings.EXPORT_ROOT,
+            help="Directory to write the pages to (default: EXPORT_ROOT).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Render every page, not only the ones whose content changed.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes rendering the pages when many of them changed.",
+        )
+
+    def handle(self, *args, **options):
+        counts = export_site(
+            options["output_dir"], full=options["full"], workers=options["workers"]
+        )
+        self.stdout.write(
+            "Rendered {rendered}, kept {kept} and removed {removed} pages.".format(
+                **counts
+            )
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from common.images import generate_variants, needs_variants
+from common.models import SiteAsset
+
+
+class Command(BaseCommand):
+    help = "Generate the missing responsive variants of image assets."
+
+    def handle(self, *args, **options):
+        count = 0
+        for asset in SiteAsset.objects.only("file", "variants").iterator():
+            if needs_variants(asset):
+                generate_variants(asset.pk)
+                count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated the variants of {count} images.")
+        )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.bundles import prune_bundles
+from common.export import get_exported_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the static bundles no page used for BUNDLE_MAX_AGE seconds, keeping "
+        "the ones linked by the exported site."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age", type=int, default=settings.BUNDLE_MAX_AGE)
+
+    def handle(self, *args, **options):
+        count = prune_bundles(
+            options["max_age"], keep=get_exported_bundles(settings.EXPORT_ROOT)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} bundles."))
@@ -1,11 +1,123 @@
 import logging
 import json
+import random
 import time
+from functools import cached_property
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 
 logger = logging.getLogger("portfolio.url")
 
 
+def indent(text, spaces=2):
+    """Add indentation to each line of data."""
+    prefix = ("=" * spaces) + " "
+    return "\n".join(f"{prefix}{line}" for line in text.split("\n"))
+
+
+def capture_body(body, max_size):
+    """Keep at most max_size bytes of a body, with its full length."""
+    return {"data": body[:max_size], "size": len(body)}
+
+
+def parse_body(captured):
+    """Decode a captured body, JSON when it was captured whole."""
+    data = captured["data"]
+    if captured["size"] > len(data):
+        text = data.decode("utf-8", errors="replace")
+        return f"{text}... (truncated, {captured['size']} bytes)"
+    return json.loads(data.decode("utf-8"))
+
+
+class RequestLog:
+    """
+    A request and its response, formatted when the log record is emitted.
+
+    Only cheap fields and references to capped body slices are taken in the request
+    thread, bodies are decoded and the text is built by the handler that emits it.
+    """
+
+    def __init__(self, request, response, duration, body_max_size, verbose):
+        self.summary = (
+            f"{request.method} {request.path} - {response.status_code} "
+            f"in {round(duration * 1000, 2)}ms"
+        )
+        self.verbose = verbose
+        self.request = {
+            "method": request.method,
+            "path": request.path,
+            "query_params": dict(request.GET),
+            "user": str(request.user) if hasattr(request, "user") else "Anonymous",
+            "ip": self._get_client_ip(request),
+            "headers": {k: v for k, v in request.META.items() if k.startswith("HTTP_")},
+            "content_type": request.content_type,
+        }
+        self.response = {
+            "status_code": response.status_code,
+            "headers": dict(response.items()),
+        }
+
+        # Log body for POST/PUT/PATCH requests (be careful with sensitive data)
+        self._request_body = None
+        if request.method in ["POST", "PUT", "PATCH"]:
+            try:
+                if request.content_type == "application/json":
+                    self._request_body = capture_body(request.body, body_max_size)
+                else:
+                    self.request["body"] = dict(request.POST)
+            except Exception:
+                self.request["body"] = "Unable to parse body"
+
+        # Log response body for non-streaming JSON responses
+        self._response_body = None
+        if not response.streaming and response.get("Content-Type", "").startswith(
+            "application/json"
+        ):
+            self._response_body = capture_body(response.content, body_max_size)
+
+    @cached_property
+    def request_data(self):
+        """return incoming request data."""
+        if self._request_body is not None:
+            try:
+                self.request["body"] = parse_body(self._request_body)
+            except Exception:
+                self.request["body"] = "Unable to parse body"
+        return self.request
+
+    @cached_property
+    def response_data(self):
+        """return the outgoing response data."""
+        if self._response_body is not None:
+            try:
+                self.response["body"] = parse_body(self._response_body)
+            except Exception:
+                self.response["body"] = "Unable to parse response"
+        return self.response
+
+    def __str__(self):
+        if not self.verbose:
+            return self.summary
+
+        request_log_text = indent(
+            "Request: " + json.dumps(self.request_data, indent=2, default=str)
+        )
+        response_log_text = indent(
+            "Response: " + json.dumps(self.response_data, indent=2, default=str)
+        )
+        return f"{self.summary}\n{request_log_text}\n{response_log_text}"
+
+    def _get_client_ip(self, request):
+        """Get the client's IP address from the request."""
+        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(",")[0]
+        else:
+            ip = request.META.get("REMOTE_ADDR")
+        return ip
+
+
 class RequestResponseLoggingMiddleware:
     """
     Middleware to log HTTP requests and responses for specified urls.
@@ -17,14 +129,39 @@ class RequestResponseLoggingMiddleware:
         '/admin/',
     ]
 
+    Or map urls to the fraction of their requests to log, the longest matching
+    prefix wins:
+    LOGGED_URLS = {
+        '/mcp/': 1.0,
+        '/oauth/': 0.1,
+    }
+
     Or set LOGGED_URLS = '__all__' to log all urls.
+
+    Bodies are logged up to LOGGED_BODY_MAX_SIZE bytes, and only decoded when the
+    record is emitted. Use common.logging.BackgroundStreamHandler to emit the
+    records outside of the request thread.
+
+    Records hold the RequestLog in their `request_log` attribute, in place of the
+    decoded `request` and `response` dicts they carried before; read
+    `record.request_log.request_data` and `.response_data` instead.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        self.logged_urls = getattr(settings, "LOGGED_URLS", [])
+        self.sample_rates = self._get_sample_rates(getattr(settings, "LOGGED_URLS", []))
+        self.body_max_size = getattr(settings, "LOGGED_BODY_MAX_SIZE", 16 * 1024)
+        self.verbose = self._is_console_logger()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         should_log = self._should_log_endpoint(request.path)
         if should_log:
             start_time = time.time()
@@ -38,113 +175,55 @@ class RequestResponseLoggingMiddleware:
 
         return response
 
+    async def __acall__(self, request):
+        should_log = self._should_log_endpoint(request.path)
+        if should_log:
+            start_time = time.time()
+
+        response = await self.get_response(request)
+
+        if should_log:
+            duration = time.time() - start_time
+            # Reading request.user may query the session, off the shared sync thread
+            # so logged requests don't queue behind each other
+            await sync_to_async(self._log_url, thread_sensitive=False)(
+                request, response, duration
+            )
+
+        return response
+
     def _is_console_logger(self):
-        """Check if any handler is a StreamHandler (console)"""
-        for handler in logger.handlers:
+        """Check if any handler writes to a stream (console), done once at init"""
+        handlers = logger.handlers + logging.getLogger().handlers
+        for handler in handlers:
             if isinstance(handler, logging.StreamHandler):
                 return True
-
-        # Also check root logger handlers
-        for handler in logging.getLogger().handlers:
-            if isinstance(handler, logging.StreamHandler):
+            # Background handlers writing to a stream
+            if getattr(handler, "is_console", False):
                 return True
         return False
 
     def _log_url(self, request, response, duration):
         """Log the URL, method, and status code."""
-        summary = self._log_summary(request, response, duration)
-        request_log_data = self._log_request(request)
-        response_log_data = self._log_response(response)
-
-        if self._is_console_logger():
-            request_log_text = self._indent(
-                "Request: " + json.dumps(request_log_data, indent=2)
-            )
-            response_log_text = self._indent(
-                "Response: " + json.dumps(response_log_data, indent=2)
-            )
-            summary += f"\n{request_log_text}\n{response_log_text}"
-
-        logger.info(
-            summary,
-            extra={
-                "request": request_log_data,
-                "response": response_log_data,
-            },
+        request_log = RequestLog(
+            request, response, duration, self.body_max_size, self.verbose
         )
+        logger.info("%s", request_log, extra={"request_log": request_log})
+
+    def _get_sample_rates(self, logged_urls):
+        """Return the (prefix, rate) pairs, the longest prefix first."""
+        if logged_urls == "__all__":
+            return [("", 1.0)]
+        if not isinstance(logged_urls, dict):
+            logged_urls = {url: 1.0 for url in logged_urls}
+        return sorted(logged_urls.items(), key=lambda item: len(item[0]), reverse=True)
 
     def _should_log_endpoint(self, path):
         """Check if the endpoint should be logged based on configuration."""
-        if not self.logged_urls:
+        if not self.sample_rates or not logger.isEnabledFor(logging.INFO):
             return False
 
-        if self.logged_urls == "__all__":
-            return True
-
-        return any(path.startswith(endpoint) for endpoint in self.logged_urls)
-
-    def _indent(self, text, spaces=2):
-        """Add indentation to each line of data."""
-        indent = ("=" * spaces) + " "
-        return "\n".join(f"{indent}{line}" for line in text.split("\n"))
-
-    def _log_summary(self, request, response, duration):
-        """Log a summary of the request and response."""
-        summary_info = f"{request.method} {request.path} - {response.status_code} in {round(duration * 1000, 2)}ms"
-        return summary_info
-
-    def _log_request(self, request):
-        """return incoming request data."""
-        log_data = {
-            "method": request.method,
-            "path": request.path,
-            "query_params": dict(request.GET),
-            "user": str(request.user) if hasattr(request, "user") else "Anonymous",
-            "ip": self._get_client_ip(request),
-            "headers": {k: v for k, v in request.META.items() if k.startswith("HTTP_")},
-            "content_type": request.content_type,
-        }
-
-        # Log body for POST/PUT/PATCH requests (be careful with sensitive data)
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                if request.content_type == "application/json":
-                    log_data["body"] = json.loads(request.body.decode("utf-8"))
-                else:
-                    log_data["body"] = dict(request.POST)
-            except Exception:
-                log_data["body"] = "Unable to parse body"
-
-        return log_data
-
-    def _log_response(self, response):
-        """return the outgoing response data."""
-        log_data = {
-            "status_code": response.status_code,
-            "headers": dict(response.items()),
-        }
-
-        # Log response body for non-binary responses (optional, can be verbose)
-        if hasattr(response, "content") and response.get("Content-Type", "").startswith(
-            "application/json"
-        ):
-            try:
-                content = response.content.decode("utf-8")
-                log_data["body"] = json.loads(content)
-                # if len(content) < 1000:  # Only log if response is small
-                #     log_data["body"] = json.loads(content)
-                # else:
-                #     log_data["body"] = f"Response too large ({len(content)} bytes)"
-            except Exception:
-                log_data["body"] = "Unable to parse response"
-
-        return log_data
-
-    def _get_client_ip(self, request):
-        """Get the client's IP address from the request."""
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate >= 1 or random.random() < rate
+        return False
@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 09:10
+
+import os
+
+import common.storage
+from django.db import migrations, models
+
+
+def move_assets_to_hashed_names(apps, schema_editor):
+    """Store existing files under their content hash, the old files are kept."""
+    SiteAsset = apps.get_model("common", "SiteAsset")
+    for asset in SiteAsset.objects.exclude(file=""):
+        name = asset.file.name
+        storage = asset.file.storage
+        if common.storage.is_immutable_name(name) or not storage.exists(name):
+            continue
+
+        with storage.open(name) as f:
+            content_hash = common.storage.get_content_hash(f)
+            new_name = storage.save(
+                f"{common.storage.ASSET_DIR}/{content_hash}/{os.path.basename(name)}", f
+            )
+        SiteAsset.objects.filter(pk=asset.pk).update(file=new_name)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0003_siteasset_homepage_section_siteasset_page_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="siteasset",
+            name="file",
+            field=models.FileField(
+                help_text="You can use this using the full url which can be found after saving the data. This also will be available for your homepage sections or posts as context variable where key is the name of the context variable.",
+                storage=common.storage.AssetStorage(),
+                upload_to=common.storage.asset_upload_to,
+            ),
+        ),
+        migrations.RunPython(move_assets_to_hashed_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0004_hashed_asset_files"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="siteasset",
+            index=models.Index(
+                fields=["post", "is_active", "is_static"], name="asset_post_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siteasset",
+            index=models.Index(
+                fields=["page", "is_active", "is_static"], name="asset_page_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siteasset",
+            index=models.Index(
+                fields=["homepage_section", "is_active", "is_static"],
+                name="asset_section_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0005_asset_owner_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="siteasset",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0006_siteasset_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="siteasset",
+            name="homepage_section",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="pages.homepagesection",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="siteasset",
+            name="page",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="pages.staticpage",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="siteasset",
+            name="post",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="posts.postdetail",
+            ),
+        ),
+    ]
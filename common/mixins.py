@@ -1,10 +1,20 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views.generic.base import ContextMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.list import MultipleObjectMixin
 
-from .navbar import get_navbar_items
+from .bundles import get_bundled_static_list
+from .chrome import get_site_chrome
 from .static import get_static_full_list
 from .renderer import ContentRenderer
+from .versions import SITE_VERSION, get_modified_time, get_versions
 
 
 class SiteContextMixin(ContextMixin):
@@ -16,8 +26,11 @@ class SiteContextMixin(ContextMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["navbar_items"] = get_navbar_items(self.is_homepage)
-        context["statics"] = get_static_full_list(self.get_extra_statics())
+        chrome = get_site_chrome(self.is_homepage)
+        context["navbar_items"] = chrome["navbar_items"]
+        context["statics"] = get_bundled_static_list(
+            get_static_full_list(self.get_extra_statics(), chrome["custom_statics"])
+        )
         context["is_homepage"] = self.is_homepage
 
         return context
@@ -32,10 +45,249 @@ class SingleObjectContentRendererMixin(SingleObjectMixin, ContentRenderer):
 
 
 class MultipleObjectContentRendererMixin(MultipleObjectMixin, ContentRenderer):
-    def get_queryset(self):
-        qs = super().get_queryset()
+    """
+    Renders the content of the objects shown on the current page.
+
+    Rendering happens once pagination has been applied, so a request only pays for the
+    objects it displays. Views whose template never shows the content can turn it off
+    with `render_object_content = False`.
+    """
+
+    render_object_content = True
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        if self.render_object_content:
+            self.render_object_list(context["object_list"])
+
+        return context
+
+    def render_object_list(self, object_list):
+        # Load the assets of every object at once instead of once per object
+        self.get_asset_resolver().prefetch(object_list)
+        for obj in object_list:
+            self.render_content(obj)
+
+        return object_list
+
+
+def normalise_page(value):
+    if value != "last" and not (value.isdigit() and int(value) > 0):
+        raise ValueError(value)
+    return str(int(value)) if value != "last" else value
+
+
+def normalise_id_list(value):
+    ids = value.split(",")
+    if not all(id.isdigit() and str(int(id)) == id for id in ids):
+        raise ValueError(value)
+    return ",".join(sorted(set(ids), key=int))
+
+
+def normalise_choice(*choices):
+    def normalise(value):
+        if value not in choices:
+            raise ValueError(value)
+        return value
+
+    return normalise
+
+
+class ContentVersionMixin:
+    """
+    Identifies the response of a request by the content it shows.
+
+    The content key holds the path, the normalised values of `content_params` and the
+    versions of `content_versions`, so it changes whenever that content does. Requests
+    with other query parameters share the key of those, requests with invalid values
+    have none.
+    """
+
+    content_versions = [SITE_VERSION]
+    # query parameter -> function returning its normalised value, or raising ValueError
+    content_params = {}
+
+    def get_content_key(self, request):
+        if not hasattr(self, "_content_key"):
+            self._content_key = self._build_content_key(request)
+        return self._content_key
+
+    def _build_content_key(self, request):
+        params = []
+        try:
+            for name, normalise in sorted(self.content_params.items()):
+                value = request.GET.get(name)
+                if value:
+                    params.append(f"{name}={normalise(value)}")
+        except ValueError:
+            return None
+
+        versions = get_versions(*self.content_versions)
+        url = f"{request.path}?{'&'.join(params)}"
+        return "{}:{}".format(
+            ":".join(str(versions[name]) for name in self.content_versions),
+            hashlib.md5(url.encode("utf-8")).hexdigest(),
+        )
+
+    def cached_view(self, data):
+        """Called for requests answered without running the view."""
+        pass
+
+
+class ConditionalGetMixin(ContentVersionMixin):
+    """
+    Adds an ETag and Last-Modified to responses, and answers conditional GET requests
+    with 304 Not Modified before anything is loaded or rendered.
+
+    The ETag is derived from the content key. Last-Modified is the latest change of the
+    content versions. For conditional requests to detail views, the object is looked up
+    by a probe query reading only its primary key and modification time; a missing
+    object gets no 304, the view answers 404. The primary key is given to
+    `cached_view()` on a 304 response.
+
+    View counts change without a content version, so views showing them set
+    `shows_view_counts`: their validators also change every VIEW_COUNT_FLUSH_INTERVAL,
+    and they get none when views are written right away.
+    """
+
+    shows_view_counts = False
+    # Off for renderings no browser cache revalidates, like the static export
+    use_conditional_get = True
+
+    def get_view_count_period(self):
+        """The start of the current view count flush interval, None without one."""
+        interval = settings.VIEW_COUNT_FLUSH_INTERVAL
+        if interval <= 0:
+            return None
+        return time.time() // interval * interval
+
+    def probe_object(self):
+        """The (pk, modified) of the object a detail view shows, or None."""
+        lookup = {self.slug_field: self.kwargs[self.slug_url_kwarg]}
+        return (
+            self.model._default_manager.filter(**lookup)
+            .values_list("pk", "modified")
+            .first()
+        )
+
+    def get_validators(self, request):
+        if not self.use_conditional_get:
+            return None
+        key = self.get_content_key(request)
+        if key is None:
+            return None
+
+        last_modified = get_modified_time(*self.content_versions)
+        if self.shows_view_counts:
+            period = self.get_view_count_period()
+            if period is None:
+                return None
+            key = f"{key}:{period}"
+            last_modified = max(last_modified or 0, period)
+
+        etag = "W/" + quote_etag(hashlib.md5(key.encode("utf-8")).hexdigest())
+
+        # Saving an object bumps its content version, so the probe is only needed to
+        # answer conditional requests for objects that may be gone
+        probe = None
+        is_conditional = any(
+            header in request.headers
+            for header in ("If-None-Match", "If-Modified-Since")
+        )
+        if is_conditional and isinstance(self, SingleObjectMixin):
+            probe = self.probe_object()
+            if probe is None:
+                return None
+            last_modified = max(last_modified or 0, probe[1].timestamp())
+
+        return etag, last_modified, probe and probe[0]
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        validators = self.get_validators(request)
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified, pk = validators
+        last_modified = int(last_modified) if last_modified is not None else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            if response.status_code == 304:
+                self.cached_view(pk)
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.headers.setdefault("ETag", etag)
+            if last_modified is not None:
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+        return response
+
+
+class PageCacheMixin(ContentVersionMixin):
+    """
+    Caches whole responses for anonymous GET requests in the shared cache.
+
+    Pages are cached under their content key, so changing the content they show purges
+    them. Views that have to do something for every request, cached or not, store what
+    they need with `get_page_cache_data()` and do it in `cached_view()`.
+
+    Visitors with a session cookie, like logged in admins, always get a fresh page, as
+    do requests `is_page_cacheable()` turns down.
+    """
+
+    # Off for renderings that mustn't end up in the cache, like the static export
+    use_page_cache = True
+
+    def is_page_cacheable(self, request):
+        return True
+
+    def get_page_cache_key(self, request):
+        if not self.use_page_cache or not settings.PAGE_CACHE_TIMEOUT:
+            return None
+        if request.method != "GET":
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        if not self.is_page_cacheable(request):
+            return None
+
+        key = self.get_content_key(request)
+        return f"page-cache:{key}" if key is not None else None
+
+    def get_page_cache_data(self):
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        key = self.get_page_cache_key(request)
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        entry = cache.get(key)
+        if entry is not None:
+            self.cached_view(entry["data"])
+            return HttpResponse(entry["content"], content_type=entry["content_type"])
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            if getattr(response, "is_rendered", True):
+                self.store_page(key, response)
+            else:
+                response.add_post_render_callback(
+                    lambda response: self.store_page(key, response)
+                )
 
-        for obj in qs:
-            obj = self.render_content(obj)
+        return response
 
-        return qs
+    def store_page(self, key, response):
+        entry = {
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "data": self.get_page_cache_data(),
+        }
+        cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
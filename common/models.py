@@ -1,5 +1,8 @@
 import re
 from django.db import models
+from django_cleanup import cleanup
+
+from .storage import AssetStorage, asset_upload_to
 
 
 class AbstractAsset(models.Model):
@@ -14,7 +17,8 @@ class AbstractAsset(models.Model):
         ),
     )
     file = models.FileField(
-        upload_to="assets/",
+        upload_to=asset_upload_to,
+        storage=AssetStorage(),
         help_text=(
             "You can use this using the full url which can be found after saving the data. "
             "This also will be available for your homepage sections or posts as context variable where "
@@ -36,16 +40,48 @@ class AbstractAsset(models.Model):
         abstract = True
 
 
+# Identical uploads share one file, common.signals only deletes it once unused
+@cleanup.ignore
 class SiteAsset(AbstractAsset):
+    # Indexed by the owner indexes below, which start with the foreign key
     post = models.ForeignKey(
-        "posts.PostDetail", on_delete=models.CASCADE, null=True, blank=True
+        "posts.PostDetail",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
     )
     page = models.ForeignKey(
-        "pages.StaticPage", on_delete=models.CASCADE, null=True, blank=True
+        "pages.StaticPage",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
     )
     homepage_section = models.ForeignKey(
-        "pages.HomePageSection", on_delete=models.CASCADE, null=True, blank=True
+        "pages.HomePageSection",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
     )
+    # Resized and converted copies of an image file, see common.images
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        # Assets are looked up by owner, global ones by all three owners being null
+        indexes = [
+            models.Index(
+                fields=["post", "is_active", "is_static"], name="asset_post_idx"
+            ),
+            models.Index(
+                fields=["page", "is_active", "is_static"], name="asset_page_idx"
+            ),
+            models.Index(
+                fields=["homepage_section", "is_active", "is_static"],
+                name="asset_section_idx",
+            ),
+        ]
 
 
 class AbstractRenderableContent(models.Model):
@@ -54,6 +90,19 @@ class AbstractRenderableContent(models.Model):
         default=False,
         help_text="Set this to true, when the 'content' field contains Django template code that requires rendering",
     )
+    rendered_content = models.TextField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="The 'content' field rendered at save time. Served while its fingerprint is current.",
+    )
+    rendered_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Hash of the content and assets 'rendered_content' was rendered from.",
+    )
 
     class Meta:
         abstract = True
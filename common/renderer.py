@@ -1,17 +1,80 @@
+import hashlib
+import logging
+
+from django.conf import settings
 from django.template import engines
 
-from .models import SiteAsset, AbstractRenderableContent
+from .assets import AssetContextResolver
+from .models import AbstractRenderableContent
+from .utils import LRUCache
+
+# Tag libraries made available to every rendered content field
+TEMPLATE_PREFIX = "{% load static %} {% load i18n %}"
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCache:
+    """
+    Process-wide cache of compiled content templates.
+
+    Templates are keyed by a hash of their source, so identical content compiles once
+    no matter how many objects or requests use it. The key last compiled for each owner
+    object is remembered, so saving the object drops its outdated template right away
+    instead of waiting for it to be evicted. Those keys are kept for as many owners as
+    there are templates; an owner dropped from them only leaves its template to the LRU.
+    """
+
+    def __init__(self, maxsize=256):
+        self._templates = LRUCache(maxsize)
+        self._owner_keys = LRUCache(maxsize)
+
+    @staticmethod
+    def get_key(template_string):
+        return hashlib.sha256(template_string.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_owner(obj):
+        return (obj._meta.label, obj.pk)
+
+    def get_template(self, template_string, owner=None):
+        key = self.get_key(template_string)
+        template = self._templates.get(key)
+        if template is None:
+            template = engines["django"].from_string(TEMPLATE_PREFIX + template_string)
+            self._templates.set(key, template)
+
+        if owner is not None:
+            self._owner_keys.set(self.get_owner(owner), key)
+
+        return template
 
+    def invalidate(self, obj, template_string=None):
+        """Drop the template compiled for obj unless it still matches template_string."""
+        key = self._owner_keys.pop(self.get_owner(obj))
+        if key is None:
+            return
 
-def render_django_template(template_string, context={}):
-    # Get the Django template engine
-    django_engine = engines["django"]
+        if template_string is not None and key == self.get_key(template_string):
+            self._owner_keys.set(self.get_owner(obj), key)
+            return
 
-    # load dango tags
-    template_string = "{% load static %} {% load i18n %}" + template_string
+        self._templates.pop(key)
 
-    # Create a template object from the template string
-    template = django_engine.from_string(template_string)
+    def clear(self):
+        self._owner_keys.clear()
+        self._templates.clear()
+
+    def info(self):
+        return self._templates.info()
+
+
+template_cache = TemplateCache(getattr(settings, "RENDERER_TEMPLATE_CACHE_SIZE", 256))
+
+
+def render_django_template(template_string, context={}, owner=None):
+    # Get the compiled template, with the static and i18n tags loaded
+    template = template_cache.get_template(template_string, owner=owner)
 
     # Render the template with the provided context
     output = template.render(context)
@@ -19,33 +82,89 @@ def render_django_template(template_string, context={}):
     return output
 
 
+def get_content_fingerprint(template_string, context):
+    """Hash everything a content render depends on: the source and its asset context."""
+    digest = hashlib.sha256(template_string.encode("utf-8"))
+    for key in sorted(context):
+        value = context[key]
+        value = getattr(value, "fingerprint", None) or getattr(value, "name", value)
+        digest.update(f"\0{key}={value}".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
 class ContentRenderer:
     """
     Handles double Django template rendering for content objects.
 
     First renders the saved content field containing Django template code,
     then passes the rendered content to the actual template for final rendering.
+
+    The first rendering is stored on the object together with a fingerprint of its
+    inputs, so it only runs again when the content or the assets have changed.
     """
 
+    def get_asset_resolver(self):
+        """The asset resolver shared by every object rendered by this instance."""
+        if getattr(self, "_asset_resolver", None) is None:
+            self._asset_resolver = AssetContextResolver()
+
+        return self._asset_resolver
+
     def get_content_context_data(self, obj, *args, **kwargs):
         """Provides context data for rendering the content field.
 
         This needs to include any context that would be needed to render the saved content.
         """
-        context = {}
-        for site_asset in SiteAsset.objects.all():
-            context[site_asset.key] = site_asset.file
-
-        return context
+        return self.get_asset_resolver().get_context(obj)
+
+    def get_rendered_content(self, renderable_object: AbstractRenderableContent):
+        """Return the rendered content, reusing the stored rendering while it is current."""
+        context = self.get_content_context_data(renderable_object)
+        fingerprint = get_content_fingerprint(renderable_object.content, context)
+
+        if (
+            renderable_object.rendered_content is not None
+            and renderable_object.rendered_fingerprint == fingerprint
+        ):
+            return renderable_object.rendered_content
+
+        rendered_content = render_django_template(
+            renderable_object.content, context, owner=renderable_object
+        )
+        self.store_rendered_content(renderable_object, rendered_content, fingerprint)
+
+        return rendered_content
+
+    def store_rendered_content(self, renderable_object, rendered_content, fingerprint):
+        # Update the row directly, storing a rendering is not a content change
+        type(renderable_object)._default_manager.filter(pk=renderable_object.pk).update(
+            rendered_content=rendered_content, rendered_fingerprint=fingerprint
+        )
+        renderable_object.rendered_content = rendered_content
+        renderable_object.rendered_fingerprint = fingerprint
+
+    def refresh_rendered_content(self, renderable_object: AbstractRenderableContent):
+        """Render and store the content of a freshly saved object."""
+        if not renderable_object.requires_rendering:
+            return
+
+        try:
+            self.get_rendered_content(renderable_object)
+        except Exception:
+            # Leave the stored rendering stale, the view will render it live
+            logger.warning(
+                "Unable to render content of %s %s.",
+                renderable_object._meta.label,
+                renderable_object.pk,
+                exc_info=True,
+            )
 
     def render_content(self, renderable_object: AbstractRenderableContent):
         if not isinstance(renderable_object, AbstractRenderableContent):
             return renderable_object
 
         if renderable_object.requires_rendering:
-            renderable_object.content = render_django_template(
-                renderable_object.content,
-                self.get_content_context_data(renderable_object),
-            )
+            renderable_object.content = self.get_rendered_content(renderable_object)
 
         return renderable_object
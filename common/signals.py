@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .assets import AssetContextResolver
+from .images import delete_variants, needs_variants, schedule_variants
+from .models import AbstractRenderableContent, SiteAsset
+from .renderer import ContentRenderer, template_cache
+from .versions import PAGES_VERSION, POSTS_VERSION, SITE_VERSION, bump_version
+
+
+@receiver(post_save)
+def refresh_saved_content(sender, instance, **kwargs):
+    """Drop the outdated compiled template and store the new rendering of the content."""
+    if isinstance(instance, AbstractRenderableContent):
+        template_cache.invalidate(instance, instance.content)
+        ContentRenderer().refresh_rendered_content(instance)
+
+
+@receiver(post_delete)
+def invalidate_deleted_content_template(sender, instance, **kwargs):
+    if isinstance(instance, AbstractRenderableContent):
+        template_cache.invalidate(instance)
+
+
+@receiver([post_save, post_delete], sender=SiteAsset)
+def refresh_asset_owner_content(sender, instance, **kwargs):
+    """Re-render the object an asset belongs to once the asset change is committed."""
+    for field_name in AssetContextResolver.owner_fields:
+        field = SiteAsset._meta.get_field(field_name)
+        owner_id = getattr(instance, field.attname)
+        if owner_id is not None:
+            transaction.on_commit(
+                lambda model=field.related_model, pk=owner_id: _refresh_content(
+                    model, pk
+                )
+            )
+
+
+def _refresh_content(model, pk):
+    # The owner may have been deleted along with the asset
+    obj = model._default_manager.filter(pk=pk).first()
+    if obj is not None:
+        ContentRenderer().refresh_rendered_content(obj)
+
+
+## Asset files
+@receiver(pre_save, sender=SiteAsset)
+def remember_previous_asset_file(sender, instance, update_fields=None, **kwargs):
+    instance._previous_file_name = None
+    if instance.pk is not None and (update_fields is None or "file" in update_fields):
+        instance._previous_file_name = (
+            SiteAsset.objects.filter(pk=instance.pk)
+            .values_list("file", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=SiteAsset)
+def delete_replaced_asset_file(sender, instance, **kwargs):
+    name = getattr(instance, "_previous_file_name", None)
+    if name and name != instance.file.name:
+        storage = instance.file.storage
+        transaction.on_commit(lambda: _delete_unused_file(storage, name))
+
+
+@receiver(post_delete, sender=SiteAsset)
+def delete_asset_file(sender, instance, **kwargs):
+    name, storage = instance.file.name, instance.file.storage
+    if name:
+        transaction.on_commit(lambda: _delete_unused_file(storage, name))
+
+
+def _delete_unused_file(storage, name):
+    # Assets with the same content share the file under its content hash
+    if not SiteAsset.objects.filter(file=name).exists():
+        storage.delete(name)
+
+
+## Image variants
+@receiver(post_save, sender=SiteAsset)
+def generate_asset_variants(sender, instance, **kwargs):
+    if needs_variants(instance):
+        asset_id = instance.pk
+        transaction.on_commit(lambda: schedule_variants(asset_id))
+
+
+@receiver(post_delete, sender=SiteAsset)
+def delete_asset_variants(sender, instance, **kwargs):
+    if instance.variants:
+        variants, storage = instance.variants, instance.file.storage
+        transaction.on_commit(lambda: delete_variants(variants, storage))
+
+
+## Content versions
+@receiver(pre_save, sender=SiteAsset)
+def remember_previous_asset_owner(sender, instance, **kwargs):
+    """Keep the owner an asset had before saving, moving it affects both owners."""
+    instance._previous_owner_ids = None
+    if instance.pk is not None:
+        instance._previous_owner_ids = (
+            SiteAsset.objects.filter(pk=instance.pk)
+            .values_list(*_asset_owner_attnames())
+            .first()
+        )
+
+
+@receiver([post_save, post_delete], sender=SiteAsset)
+def bump_asset_versions(sender, instance, **kwargs):
+    owner_ids = [getattr(instance, attname) for attname in _asset_owner_attnames()]
+    previous_owner_ids = getattr(instance, "_previous_owner_ids", None)
+
+    # Moving an asset changes the pages of both owners
+    names = {_get_asset_version(owner_ids)}
+    if previous_owner_ids:
+        names.add(_get_asset_version(previous_owner_ids))
+    bump_version(*names)
+
+
+@receiver([post_save, post_delete], sender="pages.HomePageSection")
+@receiver([post_save, post_delete], sender="pages.StaticPage")
+def bump_navbar_version(sender, instance, **kwargs):
+    # Homepage sections and static pages provide the navbar items
+    bump_version(SITE_VERSION)
+
+
+def _asset_owner_attnames():
+    return [
+        SiteAsset._meta.get_field(field_name).attname
+        for field_name in AssetContextResolver.owner_fields
+    ]
+
+
+def _get_asset_version(owner_ids):
+    post_id, page_id, homepage_section_id = owner_ids
+    if post_id is not None:
+        return POSTS_VERSION
+    if page_id is not None or homepage_section_id is not None:
+        return PAGES_VERSION
+    # Global assets are linked on every page
+    return SITE_VERSION
@@ -64,12 +64,15 @@ def get_custom_static_list():
         return []
 
 
-def get_static_full_list(extras: list = []) -> List[SiteStatic]:
+def get_static_full_list(
+    extras: list = [], custom_static_list: List[SiteStatic] = None
+) -> List[SiteStatic]:
     ss_extra = [
         extra if isinstance(extra, SiteStatic) else SiteStatic(extra)
         for extra in list(extras)
     ]
-    custom_static_list = get_custom_static_list()
+    if custom_static_list is None:
+        custom_static_list = get_custom_static_list()
     sfl = DEFAULT_STATIC_FILES + ss_extra + custom_static_list
     sfl = [ss for ss in sfl if ss.type in ["css", "js"]]
 
@@ -0,0 +1,46 @@
+"""
+Content-addressed storage of site assets.
+
+Asset files are stored under the hash of their content, as assets/<hash>/<filename>,
+so a file never changes once it has a URL: new content gets a new URL, and the same
+content uploaded again reuses the stored file. Those URLs, like the ones of static
+bundles, can be cached forever by browsers.
+"""
+
+import hashlib
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+ASSET_DIR = "assets"
+
+# Media names whose content never changes
+IMMUTABLE_NAME_RE = re.compile(r"^(assets/[0-9a-f]{16}/|bundles/[0-9a-f]{16}\.)")
+
+
+def get_content_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()[:16]
+
+
+def is_immutable_name(name):
+    return bool(IMMUTABLE_NAME_RE.match(name))
+
+
+def asset_upload_to(instance, filename):
+    return f"{ASSET_DIR}/{get_content_hash(instance.file)}/{filename}"
+
+
+@deconstructible
+class AssetStorage(FileSystemStorage):
+    """Saving a file that is already stored under its content hash keeps that file."""
+
+    def save(self, name, content, max_length=None):
+        if name and is_immutable_name(name) and self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
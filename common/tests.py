@@ -1,3 +1,603 @@
-from django.test import TestCase
+import io
+import logging
+import os
+import re
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from pages.models import StaticPage
+from posts.models import PostDetail, PostTag
+from posts.viewcounts import view_counts
+from .benchmark import generate_site, run_benchmarks
+from .bundles import get_bundled_static_list, get_local_path, minify_css, prune_bundles
+from .chrome import get_site_chrome
+from .export import export_site, load_manifest
+from .images import ResponsiveImage
+from .logging import BackgroundStreamHandler
+from .middlewares import RequestResponseLoggingMiddleware
+from .mixins import PageCacheMixin
+from .models import SiteAsset
+from .renderer import (
+    ContentRenderer,
+    TemplateCache,
+    render_django_template,
+    template_cache,
+)
+from .static import SiteStatic, get_static_full_list
+from .storage import is_immutable_name
+from .views import serve_media
+
+
+class TestTemplateCache(TestCase):
+    def setUp(self):
+        template_cache.clear()
+        self.page = StaticPage.objects.create(permalink="about", heading="About")
+
+    def test_repeat_render_uses_compiled_template(self):
+        self.assertEqual(render_django_template("{{ 1|add:1 }}"), " 2")
+        self.assertEqual(render_django_template("{{ 1|add:1 }}"), " 2")
+
+        info = template_cache.info()
+        self.assertEqual(info["misses"], 1)
+        self.assertEqual(info["hits"], 1)
+        self.assertEqual(info["size"], 1)
+
+    def test_invalidate_drops_outdated_template(self):
+        render_django_template("{{ 1|add:1 }}", owner=self.page)
+
+        template_cache.invalidate(self.page, "{{ 1|add:1 }}")
+        self.assertEqual(template_cache.info()["size"], 1)
+
+        template_cache.invalidate(self.page, "{{ 2|add:2 }}")
+        self.assertEqual(template_cache.info()["size"], 0)
+
+    def test_owner_keys_are_bounded(self):
+        cache = TemplateCache(maxsize=2)
+        for n in range(3):
+            page = StaticPage.objects.create(permalink=f"page_{n}", heading="Page")
+            cache.get_template(f"{{{{ {n}|add:1 }}}}", owner=page)
+
+        self.assertEqual(len(cache._owner_keys), 2)
+        # Owners still tracked drop their outdated template
+        cache.invalidate(page, "changed")
+        self.assertEqual(cache.info()["size"], 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestStoredRendering(TestCase):
+    def setUp(self):
+        self.page = StaticPage.objects.create(
+            permalink="about",
+            heading="About",
+            content="<p>{{ logo.url|default:'none' }}</p>",
+            requires_rendering=True,
+        )
+
+    def test_content_is_rendered_on_save(self):
+        page = StaticPage.objects.get(pk=self.page.pk)
+
+        self.assertEqual(page.rendered_content, " <p>none</p>")
+        self.assertNotEqual(page.rendered_fingerprint, "")
+
+    def test_stored_rendering_is_served_while_current(self):
+        StaticPage.objects.filter(pk=self.page.pk).update(rendered_content="stored")
+        page = StaticPage.objects.get(pk=self.page.pk)
+
+        self.assertEqual(ContentRenderer().render_content(page).content, "stored")
+
+    def test_asset_change_refreshes_rendering(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            asset = SiteAsset.objects.create(
+                key="logo",
+                file=ContentFile(get_png(1, 1), name="logo.png"),
+                page=self.page,
+                is_static=False,
+            )
+
+        page = StaticPage.objects.get(pk=self.page.pk)
+        self.assertEqual(page.rendered_content, f" <p>{asset.file.url}</p>")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestSiteChrome(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def navbar_titles(self):
+        return [item.title for item in get_site_chrome(False)["navbar_items"]]
+
+    def test_cache_hit_needs_no_queries(self):
+        get_site_chrome(False)
+
+        with self.assertNumQueries(0):
+            get_site_chrome(False)
+
+    def test_page_change_invalidates_navbar(self):
+        self.assertEqual(self.navbar_titles(), ["posts"])
+
+        StaticPage.objects.create(
+            permalink="about", heading="About", navbar_title="about", is_published=True
+        )
+        self.assertEqual(self.navbar_titles(), ["about", "posts"])
+
+    def test_global_asset_change_invalidates_statics(self):
+        get_site_chrome(False)
+
+        asset = SiteAsset.objects.create(
+            key="theme", file=ContentFile(b"body {}", name="theme.css")
+        )
+        statics = get_site_chrome(False)["custom_statics"]
+        self.assertEqual([static.url for static in statics], [asset.file.url])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), VIEW_COUNT_FLUSH_INTERVAL=0)
+class TestBenchmark(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reports_every_view_and_tool(self):
+        from mcp.registry import registry
+
+        site = generate_site(posts=6, tags=3, assets=4, sections=2, pages=1)
+        results = run_benchmarks(site, iterations=2, warmup=1)
+
+        self.assertIn("PostDetailView", results)
+        for name in registry.tools_container.registrations:
+            self.assertIn(f"mcp.{name}", results)
+        self.assertNotIn("skipped", results["mcp.search_posts"])
+        self.assertGreater(results["mcp.search_posts"]["queries"]["max"], 0)
+
+        detail = results["PostDetailView"]
+        self.assertEqual(detail["iterations"], 2)
+        self.assertLessEqual(detail["latency_ms"]["p50"], detail["latency_ms"]["max"])
+        self.assertGreater(detail["queries"]["max"], 0)
+
+
+class TestRequestLogging(TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = BackgroundStreamHandler(self.stream)
+        self.logger = logging.getLogger("portfolio.url")
+        self.original_handlers = self.logger.handlers
+        self.logger.handlers = [self.handler]
+
+    def tearDown(self):
+        self.logger.handlers = self.original_handlers
+        self.handler.close()
+
+    def get_middleware(self, body):
+        return RequestResponseLoggingMiddleware(lambda request: JsonResponse(body))
+
+    def test_body_is_capped(self):
+        request = RequestFactory().post(
+            "/mcp/", data={"text": "x" * 100}, content_type="application/json"
+        )
+        with override_settings(LOGGED_URLS=["/mcp/"], LOGGED_BODY_MAX_SIZE=20):
+            self.get_middleware({"ok": True})(request)
+        self.handler.flush()
+
+        output = self.stream.getvalue()
+        self.assertIn("POST /mcp/ - 200", output)
+        self.assertIn("(truncated, 112 bytes)", output)
+        self.assertIn('"ok": true', output)
+
+    def test_sampling_by_prefix(self):
+        request = RequestFactory().get("/oauth/token/")
+        logged_urls = {"/oauth/": 0, "/oauth/token/": 1}
+        with override_settings(LOGGED_URLS=logged_urls):
+            middleware = self.get_middleware({})
+        self.assertTrue(middleware._should_log_endpoint("/oauth/token/"))
+        self.assertFalse(middleware._should_log_endpoint("/oauth/authorize/"))
+        self.assertFalse(middleware._should_log_endpoint("/mcp/"))
+
+        middleware(request)
+        self.handler.flush()
+        self.assertIn("GET /oauth/token/", self.stream.getvalue())
+
+    def test_body_is_not_read_when_not_logged(self):
+        request = RequestFactory().post(
+            "/mcp/", data={"a": 1}, content_type="application/json"
+        )
+        with override_settings(LOGGED_URLS={"/mcp/": 0}):
+            self.get_middleware({})(request)
+        self.handler.flush()
+        self.assertEqual(self.stream.getvalue(), "")
+
+    def test_record_holds_the_request_log(self):
+        request = RequestFactory().post(
+            "/mcp/", data={"a": 1}, content_type="application/json"
+        )
+        with (
+            override_settings(LOGGED_URLS=["/mcp/"]),
+            self.assertLogs("portfolio.url") as logs,
+        ):
+            self.get_middleware({"ok": True})(request)
+
+        request_log = logs.records[0].request_log
+        self.assertEqual(request_log.request_data["body"], {"a": 1})
+        self.assertEqual(request_log.response_data["body"], {"ok": True})
+
+
+STATIC_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), STATICFILES_DIRS=[STATIC_DIR], BUNDLE_STATICS=True
+)
+class TestStaticBundles(TestCase):
+    def create_static(self, name, content):
+        path = os.path.join(STATIC_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return SiteStatic(name)
+
+    def read(self, static):
+        with open(get_local_path(static), encoding="utf-8") as f:
+            return f.read()
+
+    def test_local_runs_are_bundled_in_order(self):
+        first = self.create_static("order/first.css", "/* a */ .a {\n  color: red;\n}")
+        second = self.create_static(
+            "order/second.css", ".b { background: url(img/b.png) }"
+        )
+        asset = SiteAsset.objects.create(
+            key="theme", file=ContentFile(b".c {}", name="theme.css")
+        )
+        statics = get_static_full_list(
+            ["posts/post-detail.js"], [first, second, SiteStatic(asset.file.url)]
+        )
+
+        bundled = get_bundled_static_list(statics)
+        css = [static.url for static in bundled if static.type == "css"]
+        js = [static.url for static in bundled if static.type == "js"]
+
+        # Remote files stay as they are, uploaded assets are linked on their own
+        remote_css = [s.url for s in statics if s.type == "css" and "//" in s.url]
+        self.assertEqual(css[: len(remote_css)], remote_css)
+        self.assertEqual(len(css), len(remote_css) + 2)
+        self.assertTrue(css[-2].startswith("/media/bundles/"))
+        self.assertEqual(css[-1], asset.file.url)
+        content = self.read(SiteStatic(css[-2]))
+        self.assertTrue(
+            content.endswith(
+                ".a{color: red;}\n.b{background: url(/static/order/img/b.png)}"
+            )
+        )
+        self.assertEqual(len(js), 2)
+        self.assertIn("bundles/", js[1])
+
+    def test_bundle_is_rebuilt_when_an_input_changes(self):
+        statics = [
+            self.create_static("change/one.js", "var one = 1"),
+            self.create_static("change/two.js", "var two = 2"),
+        ]
+
+        bundle = get_bundled_static_list(statics)[0]
+        self.assertEqual(get_bundled_static_list(statics)[0].url, bundle.url)
+        self.assertEqual(self.read(bundle), "var one=1;\nvar two=2")
+
+        self.create_static("change/two.js", "var two = 22")
+        changed = get_bundled_static_list(statics)[0]
+        self.assertNotEqual(changed.url, bundle.url)
+        self.assertEqual(self.read(changed), "var one=1;\nvar two=22")
+
+    def test_strict_scripts_are_not_bundled(self):
+        statics = [
+            self.create_static("strict/strict.js", '// x\n"use strict";\nvar a = 1'),
+            self.create_static("strict/loose.js", "var b = 2"),
+        ]
+        self.assertEqual(get_bundled_static_list(statics), statics)
+
+    def test_minify_keeps_strings_and_urls(self):
+        css = (
+            '.a { content: "a ,  b ; c" ; font-family: "Open  Sans" , serif }\n'
+            '.b { background: url("data:<svg /*x*/ >") }'
+        )
+        self.assertEqual(
+            minify_css(css),
+            '.a{content: "a ,  b ; c";font-family: "Open  Sans",serif}'
+            '.b{background: url("data:<svg /*x*/ >")}',
+        )
+
+    def test_unused_bundles_are_pruned(self):
+        statics = [
+            self.create_static("prune/one.js", "var one = 1"),
+            self.create_static("prune/two.js", "var two = 2"),
+        ]
+        path = get_local_path(get_bundled_static_list(statics)[0])
+        name = f"bundles/{os.path.basename(path)}"
+
+        self.assertEqual(prune_bundles(60), 0)
+        os.utime(path, (0, 0))
+        self.assertEqual(prune_bundles(60, keep=[name]), 0)
+        self.assertEqual(prune_bundles(60), 1)
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(BUNDLE_STATICS=False)
+    def test_disabled(self):
+        statics = get_static_full_list(["posts/post-detail.js"], [])
+        self.assertEqual(get_bundled_static_list(statics), statics)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestAssetStorage(TestCase):
+    def create_asset(self, content, name="theme.css"):
+        return SiteAsset.objects.create(
+            key="theme", file=ContentFile(content, name=name)
+        )
+
+    def test_identical_uploads_share_a_file(self):
+        first = self.create_asset(b"body {}")
+        second = self.create_asset(b"body {}")
+        changed = self.create_asset(b"body { margin: 0 }")
+
+        self.assertTrue(is_immutable_name(first.file.name))
+        self.assertTrue(first.file.name.endswith("/theme.css"))
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertNotEqual(changed.file.name, first.file.name)
+
+    def test_shared_file_is_kept_until_unused(self):
+        first = self.create_asset(b"body {}")
+        second = self.create_asset(b"body {}")
+        storage = first.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.file.name))
+
+        # Replacing the file of the last asset using it deletes it
+        name = second.file.name
+        second.file = ContentFile(b"body { margin: 0 }", name="theme.css")
+        with self.captureOnCommitCallbacks(execute=True):
+            second.save()
+        self.assertFalse(storage.exists(name))
+        self.assertTrue(storage.exists(second.file.name))
+
+    def test_hashed_files_are_served_immutable(self):
+        asset = self.create_asset(b"body {}")
+        with override_settings(MEDIA_IMMUTABLE_MAX_AGE=60):
+            response = serve_media(
+                RequestFactory().get(asset.file.url),
+                asset.file.name,
+                document_root=asset.file.storage.location,
+            )
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=60, immutable")
+
+
+def get_png(width, height):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(output, "PNG")
+    return output.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    IMAGE_VARIANT_WIDTHS=[20, 40, 200],
+    IMAGE_VARIANT_FORMATS=["webp"],
+    IMAGE_VARIANT_WORKERS=0,
+)
+class TestImageVariants(TestCase):
+    def setUp(self):
+        self.post = PostDetail.objects.create(
+            permalink="post",
+            heading="Post",
+            content='<img src="{{ banner.url }}" srcset="{{ banner.srcset }}">'
+            '<source srcset="{{ banner.webp.srcset }}" type="{{ banner.webp.type }}">',
+            requires_rendering=True,
+        )
+
+    def create_asset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SiteAsset.objects.create(
+                key="banner",
+                file=ContentFile(get_png(64, 32), name="banner.png"),
+                is_static=False,
+                post=self.post,
+            )
+
+    def test_variants_are_generated_and_rendered(self):
+        asset = self.create_asset()
+        asset.refresh_from_db()
+
+        variants = asset.variants
+        self.assertEqual(variants["source"], asset.file.name)
+        self.assertEqual((variants["width"], variants["height"]), (64, 32))
+        self.assertEqual(
+            sorted((v["format"], v["width"], v["height"]) for v in variants["files"]),
+            [
+                ("PNG", 20, 10),
+                ("PNG", 40, 20),
+                ("WEBP", 20, 10),
+                ("WEBP", 40, 20),
+                ("WEBP", 64, 32),
+            ],
+        )
+        for variant in variants["files"]:
+            # Next to the original, as immutable as it
+            self.assertTrue(is_immutable_name(variant["name"]))
+            self.assertTrue(asset.file.storage.exists(variant["name"]))
+
+        image = ResponsiveImage(asset.file, variants)
+        self.assertTrue(image.srcset.endswith(f"{asset.file.url} 64w"))
+        self.assertEqual(image.webp.srcset.count("w, "), 2)
+        self.assertIsNone(image.avif)
+
+        # The stored rendering was refreshed once the variants existed
+        self.post.refresh_from_db()
+        self.assertIn(image.srcset, self.post.rendered_content)
+        self.assertIn(image.webp.srcset, self.post.rendered_content)
+        self.assertIn('type="image/webp"', self.post.rendered_content)
+
+    def test_deleted_asset_deletes_its_variants(self):
+        asset = self.create_asset()
+        asset.refresh_from_db()
+        names = [variant["name"] for variant in asset.variants["files"]]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.delete()
+
+        self.assertFalse(any(asset.file.storage.exists(name) for name in names))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), VIEW_COUNT_FLUSH_INTERVAL=60)
+class TestExportSite(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counts.flush()
+        self.output_dir = tempfile.mkdtemp()
+        self.tag = PostTag.objects.create(label="python")
+        for n in range(2):
+            post = PostDetail.objects.create(
+                permalink=f"post_{n}", heading=f"Post {n}", is_published=True
+            )
+            post.tags.add(self.tag)
+        StaticPage.objects.create(permalink="about", heading="About", is_published=True)
+
+    def read(self, name):
+        with open(f"{self.output_dir}/{name}", encoding="utf-8") as f:
+            return f.read()
+
+    def test_exports_every_page(self):
+        counts = export_site(self.output_dir)
+
+        pages = load_manifest(self.output_dir)["pages"]
+        self.assertEqual(counts["rendered"], len(pages))
+        self.assertIn("Post 0", self.read("post/post_0/index.html"))
+        self.assertIn("About", self.read("page/about/index.html"))
+        self.assertEqual(pages["/posts/?sort=latest"]["file"], "posts/sort=latest.html")
+        self.assertIn(f"/posts/?tags={self.tag.pk}", pages)
+        self.assertIn("index.html", [entry["file"] for entry in pages.values()])
+        # Rendering for the export doesn't count as a view
+        self.assertEqual(view_counts.flush(), 0)
+
+    def test_only_changed_pages_are_rendered_again(self):
+        export_site(self.output_dir)
+
+        self.assertEqual(export_site(self.output_dir)["rendered"], 0)
+
+        post = PostDetail.objects.get(permalink="post_1")
+        post.heading = "Renamed"
+        post.save()
+        PostDetail.objects.filter(permalink="post_0").update(is_published=False)
+        counts = export_site(self.output_dir)
+
+        pages = load_manifest(self.output_dir)["pages"]
+        self.assertEqual(counts["removed"], 1)
+        self.assertEqual(counts["kept"], 2)
+        self.assertNotIn("/post/post_0", pages)
+        self.assertIn("Renamed", self.read("post/post_1/index.html"))
+
+    def test_removed_pages_leave_no_empty_directories(self):
+        export_site(self.output_dir)
+
+        PostDetail.objects.update(is_published=False)
+        counts = export_site(self.output_dir)
+
+        # Both posts and the list pages of their tag
+        self.assertEqual(counts["removed"], 7)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "post")))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "index.html")))
+
+    def test_pages_only_depend_on_what_they_show(self):
+        export_site(self.output_dir)
+
+        page = StaticPage.objects.get(permalink="about")
+        page.heading = "Contact"
+        page.save()
+
+        self.assertEqual(export_site(self.output_dir)["rendered"], 1)
+        self.assertIn("Contact", self.read("page/about/index.html"))
+
+    def test_export_bypasses_the_page_cache(self):
+        with mock.patch.object(PageCacheMixin, "store_page") as store_page:
+            export_site(self.output_dir)
+
+        store_page.assert_not_called()
+
+    def test_many_stale_pages_are_rendered_on_a_pool(self):
+        export_site(self.output_dir)
+        PostDetail.objects.filter(permalink="post_1").update(
+            heading="Renamed", modified=timezone.now()
+        )
+
+        with (
+            mock.patch("common.export.POOL_MIN_PAGES", 2),
+            mock.patch("common.export.ProcessPoolExecutor") as pool_class,
+        ):
+            pool = pool_class.return_value.__enter__.return_value
+            pool.map.side_effect = lambda function, *args, chunksize: map(
+                function, *args
+            )
+            counts = export_site(self.output_dir, workers=2)
+
+        pool_class.assert_called_once()
+        self.assertGreater(counts["rendered"], 2)
+        self.assertIn("Renamed", self.read("post/post_1/index.html"))
+
+
+def get_scans(sql):
+    """The steps of the query plan of sql reading a whole table, or a whole index in
+    order to sort it."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            steps = [row[3] for row in cursor.fetchall()]
+            full_scans = [s for s in steps if re.match(r"SCAN \S+( LEFT-JOIN)?$", s)]
+            if any(s.startswith("SCAN") for s in steps) and any(
+                s.startswith("USE TEMP B-TREE FOR ORDER BY") for s in steps
+            ):
+                return full_scans + steps
+            return full_scans
+
+        cursor.execute(f"EXPLAIN {sql}")
+        columns = [column[0].lower() for column in cursor.description]
+        steps = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return [
+            step
+            for step in steps
+            if step["type"] == "ALL"
+            or (step["type"] == "index" and "filesort" in (step["extra"] or ""))
+        ]
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), PAGE_CACHE_TIMEOUT=0, VIEW_COUNT_FLUSH_INTERVAL=60
+)
+class TestQueryPlans(TestCase):
+    def test_public_pages_use_indexes(self):
+        self.addCleanup(view_counts.flush)
+        site = generate_site(posts=30, tags=3, assets=30, sections=3, pages=2)
+        post_list_url = reverse("post-list")
+        urls = [
+            reverse("home"),
+            post_list_url,
+            f"{post_list_url}?sort=latest",
+            f"{post_list_url}?sort=oldest&page=2",
+            f"{post_list_url}?sort=viewed",
+            f"{post_list_url}?tags={site['tag']}",
+            reverse("post-detail", args=[site["post"]]),
+            reverse("static-page", args=[site["page"]]),
+        ]
+
+        for url in urls:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+            for query in queries.captured_queries:
+                if query["sql"].startswith("SELECT"):
+                    with self.subTest(url=url, sql=query["sql"]):
+                        self.assertEqual(get_scans(query["sql"]), [])
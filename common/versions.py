@@ -0,0 +1,70 @@
+"""
+Content version numbers kept in the shared cache.
+
+Cached data built from some content embeds the current version of that content in its
+cache key, and signals bump the version whenever the content changes. Stale entries are
+never read again and simply expire.
+"""
+
+import time
+
+from django.core.cache import cache
+
+# Navbar items and global assets, shown on every page
+SITE_VERSION = "site"
+# Posts and their tags
+POSTS_VERSION = "posts"
+# Assets of static pages and homepage sections, the pages themselves are in SITE_VERSION
+PAGES_VERSION = "pages"
+
+VERSION_KEY = "content-version:{}"
+MODIFIED_KEY = "content-modified:{}"
+
+
+def _initial_version():
+    # Start from the clock so a version lost from the cache never reuses an old number
+    return time.time_ns() // 1_000_000
+
+
+def get_versions(*names):
+    """Return a {name: version} dict, reading all versions with one cache call."""
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+
+    return versions
+
+
+def get_version(name):
+    return get_versions(name)[name]
+
+
+def get_modified_time(*names):
+    """Return the timestamp of the latest change of the named content, or None."""
+    keys = [MODIFIED_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Unknown since the cache was cleared, count it as changed now
+            cache.add(key, time.time(), timeout=None)
+            found[key] = cache.get(key)
+
+    times = [found[key] for key in keys if found[key] is not None]
+    return max(times, default=None)
+
+
+def bump_version(*names):
+    """Invalidate everything cached from the named content."""
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+        cache.set(MODIFIED_KEY.format(name), time.time(), timeout=None)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from .storage import is_immutable_name
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """Serve a media file, with a far-future cache lifetime when its name is hashed."""
+    response = serve(request, path, document_root, show_indexes)
+    if response.status_code == 200 and is_immutable_name(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.MEDIA_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    return response
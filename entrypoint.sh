@@ -4,10 +4,22 @@ set -e
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+echo "Refreshing related posts..."
+python manage.py refresh_related_posts
+
+echo "Rebuilding the search index..."
+python manage.py rebuild_search_index
+
+echo "Generating image variants..."
+python manage.py generate_image_variants
+
 # Run migrations and collectstatic for production
 if [ "$DJANGO_SETTINGS_MODULE" = "MyPortfolio.settings.production" ]; then    
     echo "Collecting static files..."
     python manage.py collectstatic --noinput
+
+    echo "Pruning unused static bundles..."
+    python manage.py prune_bundles
 fi
 
 # Execute the passed command
@@ -0,0 +1,106 @@
+"""
+Concurrent execution of JSON-RPC batch requests.
+
+Consecutive read-only calls of a batch run together on a bounded thread pool, each
+thread with its own database connection. Any other request, such as a write tool or
+initialize, is a barrier: it runs alone, after the calls before it and before the calls
+after it, so writes keep their order and reads see the writes before them. Responses
+are returned in the order of the batch.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+# Methods that never change data, tool calls are read-only by their readOnlyHint
+READ_ONLY_METHODS = {
+    "tools/list",
+    "resources/list",
+    "resources/templates/list",
+    "resources/read",
+    "prompts/list",
+    "prompts/get",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class BatchResponseContext:
+    """Responses of a batch, with the interface of mcp_serializer's ResponseContext."""
+
+    def __init__(self):
+        self.response_data = []
+        self.history = []
+
+    def add(self, response_context):
+        self.history.extend(response_context.history)
+        if response_context.response_data:
+            self.response_data.append(response_context.response_data)
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.MCP_BATCH_MAX_WORKERS,
+                    thread_name_prefix="mcp-batch",
+                )
+    return _executor
+
+
+def is_read_only(registry, item):
+    if not isinstance(item, dict) or item.get("id") is None:
+        return False
+
+    method = item.get("method")
+    if method == "tools/call":
+        params = item.get("params")
+        name = params.get("name") if isinstance(params, dict) else None
+        tool = registry.tools_container.registrations.get(name)
+        annotations = tool.extra.get("annotations") if tool else None
+        return bool(annotations and annotations.get("readOnlyHint"))
+    return method in READ_ONLY_METHODS
+
+
+def process_request_in_thread(serializer, item):
+    """Process one request on a worker thread, closing the connections it opened."""
+    try:
+        return serializer.process_request(item)
+    finally:
+        # Pool threads outlive the call, don't leave its connection open
+        connections.close_all()
+
+
+def group_batch(registry, items):
+    """Split a batch into (read_only, items) runs, each write or other call alone."""
+    groups = []
+    for item in items:
+        read_only = is_read_only(registry, item)
+        if read_only and groups and groups[-1][0]:
+            groups[-1][1].append(item)
+        else:
+            groups.append((read_only, [item]))
+    return groups
+
+
+def process_batch(serializer, items):
+    """Process a JSON-RPC batch, running consecutive read-only calls concurrently."""
+    batch_context = BatchResponseContext()
+    for read_only, group in group_batch(serializer.registry, items):
+        if read_only and len(group) > 1 and settings.MCP_BATCH_MAX_WORKERS > 1:
+            futures = [
+                get_executor().submit(process_request_in_thread, serializer, item)
+                for item in group
+            ]
+            for future in futures:
+                batch_context.add(future.result())
+        else:
+            for item in group:
+                batch_context.add(serializer.process_request(item))
+    return batch_context
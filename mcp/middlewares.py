@@ -2,6 +2,7 @@
 Middleware for MCP OAuth authentication
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.urls import reverse
 
 
@@ -11,12 +12,26 @@ class WWWAuthenticateMiddleware:
     for OAuth-protected resources
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
 
+    def process_response(self, request, response):
         # Add WWW-Authenticate header for 401 responses on MCP endpoints
         if response.status_code == 401 and request.path_info.startswith("/mcp/"):
             resource_metadata_url = request.build_absolute_uri(
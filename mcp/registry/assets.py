@@ -7,6 +7,7 @@ from mcp_serializer.features.tool.result import ToolsResult
 from posts.models import PostDetail
 from pages.models import StaticPage, HomePageSection
 from common.models import SiteAsset
+from ..utils import get_asset_name_from_uri, read_asset_chunk
 from .registry import registry
 
 
@@ -23,7 +24,8 @@ def create_site_asset(
 
     Creates any type of file asset. The file will be automatically configured based on its extension:
     - CSS/JS files: Automatically linked as static resources (is_static=True)
-    - Other files (images, JSON, etc.): Available as Django template context variables (is_static=False)
+    - Other files (images, JSON, etc.): Available as Django template context variables in the content of
+      what they are linked to, or of every post, page and section when global (is_static=False)
 
     If no reference is provided (post, page, or homepage_section), the asset is global
     and will be available across the entire site.
@@ -212,3 +214,53 @@ def delete_site_asset(
         return f"Asset '{filename}' deleted successfully from {scope}"
     else:
         return f"Error: Asset '{filename}' not found in {scope}"
+
+
+@registry.tool(annotations={"readOnlyHint": True})
+def read_site_asset(
+    uri: str,
+    offset: int = 0,
+    length: Optional[int] = None,
+) -> str:
+    """Read a site asset in chunks.
+
+    Use this for assets returned as resource links by get_post, get_page or
+    get_homepage_section because they were too large to embed. Text files are returned
+    as text, other files as base64 encoded data. Keep reading from next_offset until it
+    is null. Compare the etag between reads to detect a file that changed meanwhile.
+
+    Args:
+        uri: URI of the asset, as in the resource link.
+        offset: Byte position to start reading from (default: 0).
+        length: Maximum number of bytes to read (default and maximum: 256 KiB).
+    """
+    if offset < 0:
+        result = ToolsResult(is_error=True)
+        result.add_text_content("Error: offset can't be negative")
+        return result
+
+    asset = SiteAsset.objects.filter(file=get_asset_name_from_uri(uri)).first()
+    if asset is None:
+        result = ToolsResult(is_error=True)
+        result.add_text_content(f"Error: Asset with URI '{uri}' does not exist")
+        return result
+
+    try:
+        chunk = read_asset_chunk(asset, offset, length)
+    except OSError:
+        result = ToolsResult(is_error=True)
+        result.add_text_content(f"Error: File of asset '{uri}' can't be read")
+        return result
+
+    result = ToolsResult()
+    result.add_structured_content(
+        {key: chunk[key] for key in chunk if key not in ("text", "blob")}
+    )
+    result.add_embedded_resource(
+        uri=chunk["uri"],
+        text=chunk["text"],
+        blob=chunk["blob"],
+        mime_type=chunk["mime_type"],
+        name=chunk["name"],
+    )
+    return result
@@ -9,7 +9,10 @@ from ..schema import (
     HomePageSectionDetailResponse,
     HomePageSectionListResponse,
     _homepage_section_to_response,
+    _invalid_view_result,
+    _select_fields,
 )
+from ..utils import AssetBudget, InvalidCursor, get_page_size, paginate_queryset
 from .registry import registry
 
 
@@ -48,12 +51,14 @@ def create_homepage_section(
     return f"Homepage section '{section.name}' created successfully."
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def get_homepage_section(name: str) -> HomePageSectionDetailResponse:
     """Retrieve a specific homepage section.
 
-    Fetches section details and associated CSS/JS assets as embedded resources.
-    Note: All assets from ALL active homepage sections are included, as they are shared across the homepage.
+    Fetches section details and associated assets. Small assets are embedded, larger ones
+    are resource links that can be read with read_site_asset.
+    Note: Assets of ALL active homepage sections are included, as their CSS/JS files are loaded on the whole homepage.
+    Their images, JSON and other files are only template variables in their own section's content.
 
     Args:
         name: The unique name of the homepage section.
@@ -68,34 +73,54 @@ def get_homepage_section(name: str) -> HomePageSectionDetailResponse:
 
     result.add_structured_content(_homepage_section_to_response(section))
 
-    # Add CSS and JS assets from ALL active homepage sections (assets are shared)
-    active_sections = HomePageSection.objects.filter(is_active=True)
-    for active_section in active_sections:
-        assets = SiteAsset.objects.filter(homepage_section=active_section)
-        for asset in assets:
-            result.add_file(file=asset.file, title=asset.description or asset.key)
+    # Add assets from ALL active homepage sections (their CSS/JS is shared)
+    assets = SiteAsset.objects.filter(homepage_section__is_active=True).order_by(
+        "homepage_section__serial", "homepage_section__created", "pk"
+    )
+    budget = AssetBudget()
+    for asset in assets:
+        budget.add(result, asset)
     return result
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def list_homepage_sections(
     limit: Optional[int] = None,
+    view: str = "detail",
+    cursor: Optional[str] = None,
 ) -> HomePageSectionListResponse:
-    """List active homepage sections.
+    """List active homepage sections, one page at a time.
 
-    Lists all active homepage sections, with option to limit the number of results.
-    Only active sections are returned.
+    Lists all active homepage sections in their homepage order. Only active sections
+    are returned. When more sections are left, the response has a next_cursor; pass
+    it as cursor to get the next page.
 
     Args:
-        limit: Maximum number of sections to return.
+        limit: Maximum number of sections per page (default: 50, at most 200).
+        view: "summary" to leave out the section content when browsing, "detail" (default) to include it.
+        cursor: The next_cursor of the previous page.
     """
+    error = _invalid_view_result(view)
+    if error is not None:
+        return error
+
     queryset = HomePageSection.objects.filter(is_active=True)
 
-    if limit:
-        queryset = queryset[:limit]
+    queryset = _select_fields(queryset, view)
+    try:
+        sections, next_cursor = paginate_queryset(
+            queryset, cursor, get_page_size(limit)
+        )
+    except InvalidCursor as e:
+        result = ToolsResult(is_error=True)
+        result.add_text_content(f"Error: {e}")
+        return result
 
     return HomePageSectionListResponse(
-        section_list=[_homepage_section_to_response(section) for section in queryset]
+        section_list=[
+            _homepage_section_to_response(section, view) for section in sections
+        ],
+        next_cursor=next_cursor,
     )
 
 
@@ -158,7 +183,7 @@ def homepage_section_create_prompt():
 - **content**: HTML body with full Django template language support
   - Bootstrap 5 CSS and JavaScript are already loaded and available
   - Supports Django template syntax: variables, conditionals, loops, filters
-  - All assets are available as context variables: {{ filename_without_extension.url }}
+  - The section's own media assets and global assets are available as context variables: {{ filename_without_extension.url }}
 
 **Optional Fields:**
 - **navbar_title**: Title to display in the top navigation bar
@@ -171,22 +196,21 @@ def homepage_section_create_prompt():
 **Adding Assets (CSS, JS, Images, JSON, etc.):**
 Use the `create_site_asset` tool to add any type of file to your section:
 
-**IMPORTANT: Assets are SHARED across ALL homepage sections!**
-- Any asset added to any section is available to ALL sections on the homepage
-- This allows you to create consistent styling and shared resources
+**IMPORTANT: Only CSS/JS files are SHARED across ALL homepage sections!**
 - CSS/JS files from all active sections are automatically loaded on the homepage
+- Images, JSON and other files are only available in the content of the section they belong to
+- For an image used by several sections, create it as a global asset (no homepage_section_name)
 
 **For CSS/JS Files (automatically linked):**
 - These are automatically included when viewing the homepage
-- Available to ALL homepage sections
+- They apply to ALL homepage sections
 - Example: `create_site_asset(filename="hero.css", file_content=css_text, homepage_section_name="hero")`
 - Example: `create_site_asset(filename="hero.js", file_content=js_text, homepage_section_name="hero")`
 
 **For Images, JSON, and other files (available as template variables):**
-- These are available in Django templates as context variables
+- These are available as context variables in this section's content only, along with global assets
 - Access using: {{ filename_without_extension.url }}
-- Available to ALL homepage sections
-- Example: For "banner.jpg", use {{ banner.url }} in ANY section's content
+- Example: For "banner.jpg" created for the "hero" section, use {{ banner.url }} in the hero section's content
 - Example: `create_site_asset(filename="banner.jpg", file_content=base64_encoded_image, homepage_section_name="hero")`
 - Example: `create_site_asset(filename="data.json", file_content=json_text, homepage_section_name="skills")`
 
@@ -211,7 +235,7 @@ def homepage_section_update_prompt():
 **Updatable Fields (all optional):**
 - **new_name**: Change section identifier (must remain unique)
 - **content**: Update HTML body (supports Django template language)
-  - All assets are available as context variables: {{ filename_without_extension.url }}
+  - The section's own media assets and global assets are available as context variables: {{ filename_without_extension.url }}
 - **navbar_title**: Update navbar title (set to empty string "" to remove from navbar)
 - **serial**: Update order position on homepage
 - **is_active**: Toggle section visibility (True/False)
@@ -219,15 +243,14 @@ def homepage_section_update_prompt():
 **Managing Assets:**
 Use `create_site_asset` and `delete_site_asset` to manage CSS, JS, images, JSON, and other files.
 
-**IMPORTANT: Assets are SHARED across ALL homepage sections!**
-- Any asset added to any section is available to ALL sections on the homepage
-- When you add/update an asset for one section, it affects all sections
-- This allows for consistent styling and shared resources across the homepage
+**IMPORTANT: Only CSS/JS files are SHARED across ALL homepage sections!**
+- CSS/JS files of any active section are loaded on the whole homepage, changing one affects all sections
+- Images, JSON and other files are template variables in their own section's content only, along with global assets
+- For an image used by several sections, create it as a global asset (no homepage_section_name)
 
 **To add a new asset:**
 - `create_site_asset(filename="custom.css", file_content=css_text, homepage_section_name=section_name)`
-- CSS/JS files are automatically linked; other files are available as template variables
-- The asset will be available to ALL homepage sections
+- CSS/JS files are automatically linked for the whole homepage; other files are template variables in this section's content
 
 **To update an asset:**
 1. Delete: `delete_site_asset(filename="custom.css", homepage_section_name=section_name)`
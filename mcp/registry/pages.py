@@ -9,8 +9,11 @@ from mcp_serializer.features.prompt.result import PromptsResult
 from ..schema import (
     PageDetailResponse,
     PageListResponse,
+    _invalid_view_result,
     _page_to_response,
+    _select_fields,
 )
+from ..utils import AssetBudget, InvalidCursor, get_page_size, paginate_queryset
 from .registry import registry
 
 
@@ -52,11 +55,12 @@ def create_page(
     return f"Page with permalink {page.permalink} created successfully."
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def get_page(permalink: str) -> PageDetailResponse:
     """Retrieve a specific static page.
 
-    Fetches page details and associated CSS/JS assets as embedded resources.
+    Fetches page details and associated assets. Small assets are embedded, larger ones
+    are resource links that can be read with read_site_asset.
 
     Args:
         permalink: The unique permalink of the page.
@@ -71,36 +75,53 @@ def get_page(permalink: str) -> PageDetailResponse:
 
     result.add_structured_content(_page_to_response(page))
 
-    # Add CSS and JS assets as embedded files
-    assets = SiteAsset.objects.filter(page=page)
-    for asset in assets:
-        result.add_file(file=asset.file, title=asset.description or asset.key)
+    # Add assets as embedded files, or links when they are large
+    budget = AssetBudget()
+    for asset in SiteAsset.objects.filter(page=page):
+        budget.add(result, asset)
     return result
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def list_pages(
     is_published: Optional[bool] = None,
     limit: Optional[int] = None,
+    view: str = "detail",
+    cursor: Optional[str] = None,
 ) -> PageListResponse:
-    """List static pages with optional filtering.
+    """List static pages with optional filtering, one page at a time.
 
-    Lists all the available static pages, with options to filter by publication status
-    and to limit the number of results.
+    Lists all the available static pages, with option to filter by publication status.
+    When more pages are left, the response has a next_cursor; pass it as cursor to
+    get the next page.
 
     Args:
         is_published: Filter by publication status (True/False/None for all).
-        limit: Maximum number of pages to return.
+        limit: Maximum number of pages per page of results (default: 50, at most 200).
+        view: "summary" to leave out the page content when browsing, "detail" (default) to include it.
+        cursor: The next_cursor of the previous page of results.
     """
+    error = _invalid_view_result(view)
+    if error is not None:
+        return error
+
     queryset = StaticPage.objects.all()
 
     if is_published is not None:
         queryset = queryset.filter(is_published=is_published)
 
-    if limit:
-        queryset = queryset[:limit]
+    queryset = _select_fields(queryset, view)
+    try:
+        pages, next_cursor = paginate_queryset(queryset, cursor, get_page_size(limit))
+    except InvalidCursor as e:
+        result = ToolsResult(is_error=True)
+        result.add_text_content(f"Error: {e}")
+        return result
 
-    return PageListResponse(page_list=[_page_to_response(page) for page in queryset])
+    return PageListResponse(
+        page_list=[_page_to_response(page, view) for page in pages],
+        next_cursor=next_cursor,
+    )
 
 
 @registry.tool()
@@ -162,7 +183,7 @@ def page_create_prompt():
 - **content**: HTML body with full Django template language support
   - Bootstrap 5 CSS and JavaScript are already loaded and available
   - Supports Django template syntax: variables, conditionals, loops, filters
-  - All assets are available as context variables: {{ filename_without_extension.url }}
+  - The page's own media assets and global assets are available as context variables: {{ filename_without_extension.url }}
 
 **Optional Fields:**
 - **navbar_title**: Title to display in the top navigation bar
@@ -182,7 +203,7 @@ Use the `create_site_asset` tool to add any type of file to your page:
 - Example: `create_site_asset(filename="custom.js", file_content=js_text, page_permalink="about-me")`
 
 **For Images, JSON, and other files (available as template variables):**
-- These are available in Django templates as context variables
+- These are available as context variables in this page's content only
 - Access using: {{ filename_without_extension.url }}
 - Example: For "banner.jpg", use {{ banner.url }} in the content
 - Example: `create_site_asset(filename="banner.jpg", file_content=base64_encoded_image, page_permalink="about-me")`
@@ -209,7 +230,7 @@ def page_update_prompt():
 - **new_permalink**: Change URL identifier (must remain unique)
 - **heading**: Update title
 - **content**: Update HTML body (supports Django template language)
-  - All assets are available as context variables: {{ filename_without_extension.url }}
+  - The page's own media assets and global assets are available as context variables: {{ filename_without_extension.url }}
 - **navbar_title**: Update navbar title (set to empty string "" to remove from navbar)
 - **navbar_serial**: Update navbar order position
 
@@ -5,13 +5,19 @@ import json
 from mcp_serializer.features.tool.result import ToolsResult
 
 from posts.models import PostDetail, PostTag
+from posts.search import search
 from common.models import SiteAsset
 from mcp_serializer.features.prompt.result import PromptsResult
 from ..schema import (
     PostDetailResponse,
     PostListResponse,
+    PostSearchResponse,
+    SUMMARY_VIEW,
+    _invalid_view_result,
     _post_to_response,
+    _select_post_fields,
 )
+from ..utils import AssetBudget, InvalidCursor, get_page_size, paginate_queryset
 from .registry import registry
 
 
@@ -95,11 +101,12 @@ def create_post(
     return f"Post with permalink {post.permalink} created successfully."
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def get_post(permalink: str) -> PostDetailResponse:
     """Retrieve a specific blog post.
 
-    Fetches post details and associated CSS/JS assets as embedded resources.
+    Fetches post details and associated assets. Small assets are embedded, larger ones
+    are resource links that can be read with read_site_asset.
 
     Args:
         permalink: The unique permalink of the post.
@@ -114,29 +121,38 @@ def get_post(permalink: str) -> PostDetailResponse:
 
     result.add_structured_content(_post_to_response(post))
 
-    # Add CSS and JS assets as embedded files
-    assets = SiteAsset.objects.filter(post=post)
-    for asset in assets:
-        result.add_file(file=asset.file, title=asset.description or asset.key)
+    # Add assets as embedded files, or links when they are large
+    budget = AssetBudget()
+    for asset in SiteAsset.objects.filter(post=post):
+        budget.add(result, asset)
     return result
 
 
-@registry.tool()
+@registry.tool(annotations={"readOnlyHint": True})
 def list_posts(
     is_published: Optional[bool] = None,
     tag_id: Optional[int] = None,
     limit: Optional[int] = None,
+    view: str = "detail",
+    cursor: Optional[str] = None,
 ) -> PostListResponse:
-    """List blog posts with optional filtering.
+    """List blog posts with optional filtering, one page at a time.
 
-    Lists all the available blog posts, with options to filter by publication status
-    and tags, and to limit the number of results.
+    Lists the available blog posts in their display order, with options to filter by
+    publication status and tags. When more posts are left, the response has a
+    next_cursor; pass it as cursor to get the next page.
 
     Args:
         is_published: Filter by publication status (True/False/None for all).
         tag_id: Filter by specific tag ID.
-        limit: Maximum number of posts to return.
+        limit: Maximum number of posts per page (default: 50, at most 200).
+        view: "summary" to leave out the post content when browsing, "detail" (default) to include it.
+        cursor: The next_cursor of the previous page.
     """
+    error = _invalid_view_result(view)
+    if error is not None:
+        return error
+
     queryset = PostDetail.objects.all()
 
     if is_published is not None:
@@ -145,10 +161,51 @@ def list_posts(
     if tag_id is not None:
         queryset = queryset.filter(tags__id=tag_id)
 
-    if limit:
-        queryset = queryset[:limit]
+    queryset = _select_post_fields(queryset, view)
+    try:
+        posts, next_cursor = paginate_queryset(queryset, cursor, get_page_size(limit))
+    except InvalidCursor as e:
+        result = ToolsResult(is_error=True)
+        result.add_text_content(f"Error: {e}")
+        return result
+
+    return PostListResponse(
+        post_list=[_post_to_response(post, view) for post in posts],
+        next_cursor=next_cursor,
+    )
+
+
+@registry.tool(annotations={"readOnlyHint": True})
+def search_posts(
+    query: str,
+    limit: Optional[int] = None,
+    include_unpublished: bool = False,
+) -> PostSearchResponse:
+    """Search blog posts by their heading, introduction and content.
+
+    Every word of the query has to match, "quoted phrases" have to match as they are.
+    Posts are returned as summaries with their score, the most relevant first.
+
+    Args:
+        query: Words and "quoted phrases" to search for.
+        limit: Maximum number of posts (default: 50, at most 200).
+        include_unpublished: Also search draft posts (default: False).
+    """
+    results = search(
+        query, published_only=not include_unpublished, limit=get_page_size(limit)
+    )
+    posts = _select_post_fields(
+        PostDetail.objects.filter(pk__in=[post_id for post_id, _ in results]),
+        SUMMARY_VIEW,
+    ).in_bulk()
 
-    return PostListResponse(post_list=[_post_to_response(post) for post in queryset])
+    post_list = []
+    for post_id, score in results:
+        if post_id in posts:
+            response = _post_to_response(posts[post_id], SUMMARY_VIEW).model_dump()
+            response["score"] = round(score, 4)
+            post_list.append(response)
+    return PostSearchResponse(post_list=post_list)
 
 
 @registry.tool()
@@ -241,7 +298,7 @@ def post_create_prompt():
 - **content**: HTML body with full Django template language support
   - Bootstrap 5 CSS and JavaScript are already loaded and available
   - Supports Django template syntax: variables, conditionals, loops, filters
-  - All media files are available as context variables (see Media Files section below)
+  - The post's own media assets and global assets are available as context variables (see Adding Assets below)
   - If media file is needed add it's reference like this: {{{{ filename_without_extension.url }}}} even before creating it.
 - **tags**: At least 1 tag as list of tuples: [(label, text_color, bg_color)]
   - Existing tags: {existing_tags_str}
@@ -261,7 +318,7 @@ Use the `create_site_asset` tool to add any type of file to your post:
 - Example: `create_site_asset(filename="custom.js", file_content=js_text, post_permalink="my-post")`
 
 **For Images, JSON, and other files (available as template variables):**
-- These are available in Django templates as context variables
+- These are available as context variables in this post's content only
 - Access using: {{{{ filename_without_extension.url }}}}
 - Example: For "banner.jpg", use {{{{ banner.url }}}} in the content
 - Example: `create_site_asset(filename="banner.jpg", file_content=base64_encoded_image, post_permalink="my-post")`
@@ -297,7 +354,7 @@ def post_update_prompt():
 - **new_permalink**: Change URL identifier (must remain unique)
 - **heading**: Update title
 - **content**: Update HTML body (supports Django template language)
-  - All assets are available as context variables: {{{{ filename_without_extension.url }}}}
+  - The post's own media assets and global assets are available as context variables: {{{{ filename_without_extension.url }}}}
 - **introduction**: Update summary
 - **include_sublinks**: Toggle table of contents
 - **tags**: Replace tags with new list [(label, text_color, bg_color)]
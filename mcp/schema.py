@@ -1,18 +1,26 @@
+from django.db.models import Prefetch
+from mcp_serializer.features.tool.result import ToolsResult
 from pydantic import BaseModel
 from posts.models import PostDetail, PostTag
 from pages.models import StaticPage, HomePageSection
 from common.models import SiteAsset
 from typing import Optional
 
+# Field projections of the list tools, summary leaves out the content
+SUMMARY_VIEW = "summary"
+DETAIL_VIEW = "detail"
+VIEWS = (SUMMARY_VIEW, DETAIL_VIEW)
 
-class PostDetailResponse(BaseModel):
-    """Response model for PostDetail."""
+RENDERED_FIELDS = ("rendered_content", "rendered_fingerprint")
+
+
+class PostSummaryResponse(BaseModel):
+    """Response model for PostDetail without its content."""
 
     id: int
     permalink: str
     heading: str
     introduction: Optional[str]
-    content: str
     is_published: bool
     publish_date: Optional[str]
     view_count: int
@@ -21,45 +29,70 @@ class PostDetailResponse(BaseModel):
     feature: int
 
 
-class PageDetailResponse(BaseModel):
-    """Response model for StaticPage."""
+class PostDetailResponse(PostSummaryResponse):
+    """Response model for PostDetail."""
+
+    content: str
+
+
+class PageSummaryResponse(BaseModel):
+    """Response model for StaticPage without its content."""
 
     id: int
     permalink: str
     heading: str
-    content: str
     is_published: bool
     navbar_title: Optional[str]
     navbar_serial: int
 
 
-class HomePageSectionDetailResponse(BaseModel):
-    """Response model for HomePageSection."""
+class PageDetailResponse(PageSummaryResponse):
+    """Response model for StaticPage."""
+
+    content: str
+
+
+class HomePageSectionSummaryResponse(BaseModel):
+    """Response model for HomePageSection without its content."""
 
     id: int
     name: str
-    content: str
     navbar_title: Optional[str]
     serial: int
     is_active: bool
 
 
+class HomePageSectionDetailResponse(HomePageSectionSummaryResponse):
+    """Response model for HomePageSection."""
+
+    content: str
+
+
 class PostListResponse(BaseModel):
     """Response model for list of posts."""
 
     post_list: list
+    next_cursor: Optional[str] = None
+
+
+class PostSearchResponse(BaseModel):
+    """Response model for the posts matching a search, the most relevant first."""
+
+    post_list: list
 
 
 class PageListResponse(BaseModel):
     """Response model for list of pages."""
 
     page_list: list
+    next_cursor: Optional[str] = None
 
 
 class HomePageSectionListResponse(BaseModel):
     """Response model for list of homepage sections."""
 
     section_list: list
+    next_cursor: Optional[str] = None
 
 
 class PostAssetListResponse(BaseModel):
@@ -69,57 +102,101 @@ class PostAssetListResponse(BaseModel):
 
 
 # Helper Functions
-def _post_to_response(post: PostDetail) -> PostDetailResponse:
+def _select_fields(queryset, view: str = DETAIL_VIEW):
+    """Defer the columns the serializers of a view never read.
+
+    Args:
+        queryset: PostDetail, StaticPage or HomePageSection queryset.
+        view: "summary" to leave out the content, "detail" otherwise.
+    """
+    if view == SUMMARY_VIEW:
+        return queryset.defer("content", *RENDERED_FIELDS)
+    return queryset.defer(*RENDERED_FIELDS)
+
+
+def _invalid_view_result(view: str) -> Optional[ToolsResult]:
+    """The error result of a list tool given an unknown view, None for a known one."""
+    if view in VIEWS:
+        return None
+    result = ToolsResult(is_error=True)
+    result.add_text_content(f"Unknown view '{view}', use one of: {', '.join(VIEWS)}")
+    return result
+
+
+def _select_post_fields(queryset, view: str = DETAIL_VIEW):
+    """Defer unread columns and prefetch tag labels, so posts serialize in two queries.
+
+    Args:
+        queryset: PostDetail queryset.
+        view: "summary" to leave out the content, "detail" otherwise.
+    """
+    return _select_fields(queryset, view).prefetch_related(
+        Prefetch("tags", queryset=PostTag.objects.only("id", "label"))
+    )
+
+
+def _post_to_response(post: PostDetail, view: str = DETAIL_VIEW) -> PostSummaryResponse:
     """Convert a PostDetail model instance to PostDetailResponse.
 
+    Uses the prefetched tags of the post when there are any.
+
     Args:
         post: PostDetail model instance.
+        view: "summary" to leave out the content, "detail" otherwise.
     """
-    return PostDetailResponse(
+    data = dict(
         id=post.id,
         permalink=post.permalink,
         heading=post.heading,
         introduction=post.introduction or None,
-        content=post.content,
         is_published=post.is_published,
         publish_date=str(post.publish_date) if post.publish_date else None,
         view_count=post.view_count,
         include_sublinks=post.include_sublinks,
-        tags=list(post.tags.values_list("label", flat=True)),
+        tags=[tag.label for tag in post.tags.all()],
         feature=post.feature,
     )
+    if view == SUMMARY_VIEW:
+        return PostSummaryResponse(**data)
+    return PostDetailResponse(content=post.content, **data)
 
 
-def _page_to_response(page: StaticPage) -> PageDetailResponse:
+def _page_to_response(page: StaticPage, view: str = DETAIL_VIEW) -> PageSummaryResponse:
     """Convert a StaticPage model instance to PageDetailResponse.
 
     Args:
         page: StaticPage model instance.
+        view: "summary" to leave out the content, "detail" otherwise.
     """
-    return PageDetailResponse(
+    data = dict(
         id=page.id,
         permalink=page.permalink,
         heading=page.heading,
-        content=page.content,
         is_published=page.is_published,
         navbar_title=page.navbar_title or None,
         navbar_serial=page.navbar_serial,
     )
+    if view == SUMMARY_VIEW:
+        return PageSummaryResponse(**data)
+    return PageDetailResponse(content=page.content, **data)
 
 
 def _homepage_section_to_response(
-    section: HomePageSection,
-) -> HomePageSectionDetailResponse:
+    section: HomePageSection, view: str = DETAIL_VIEW
+) -> HomePageSectionSummaryResponse:
     """Convert a HomePageSection model instance to HomePageSectionDetailResponse.
 
     Args:
         section: HomePageSection model instance.
+        view: "summary" to leave out the content, "detail" otherwise.
     """
-    return HomePageSectionDetailResponse(
+    data = dict(
         id=section.id,
         name=section.name,
-        content=section.content,
         navbar_title=section.navbar_title or None,
         serial=section.serial,
         is_active=section.is_active,
     )
+    if view == SUMMARY_VIEW:
+        return HomePageSectionSummaryResponse(**data)
+    return HomePageSectionDetailResponse(content=section.content, **data)
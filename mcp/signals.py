@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oauth2_provider.settings import oauth2_settings
+
+from .tokens import invalidate_token
+
+
+# Revoking an access token deletes it, saving may change its scope or expiry
+@receiver([post_save, post_delete], sender=oauth2_settings.ACCESS_TOKEN_MODEL)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.token)
@@ -0,0 +1,81 @@
+"""
+Streamable HTTP transport for the async MCP endpoint.
+
+Requests are processed on worker threads, outside the event loop, so a slow call only
+holds its own thread. Responses are written as server-sent events as soon as their
+call finishes. A request with a progress token gets a progress notification when its
+call starts, and comment lines keep the stream alive while a long call runs.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .batch import group_batch, process_request_in_thread
+
+
+def sse_event(data):
+    return f"event: message\ndata: {json.dumps(data)}\n\n"
+
+
+def needs_response(item):
+    """False for notifications and for responses to server requests."""
+    if not isinstance(item, dict):
+        return True
+    if "method" in item:
+        return item.get("id") is not None
+    return not ("result" in item or "error" in item)
+
+
+def get_progress_token(item):
+    params = item.get("params") if isinstance(item, dict) else None
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    return meta.get("progressToken") if isinstance(meta, dict) else None
+
+
+async def process_request(serializer, item):
+    """Process one request on its own thread, with its own database connection."""
+    return await sync_to_async(process_request_in_thread, thread_sensitive=False)(
+        serializer, item
+    )
+
+
+async def iter_messages(serializer, items):
+    """Yield progress notifications and responses of a batch as its calls finish.
+
+    Consecutive read-only calls run concurrently, any other call runs alone in order,
+    as in mcp.batch. None is yielded while a call has been running for
+    MCP_STREAM_KEEPALIVE seconds, for the transport to keep the connection alive.
+    """
+    for _, group in group_batch(serializer.registry, items):
+        tasks = []
+        for item in group:
+            token = get_progress_token(item)
+            if token is not None:
+                yield {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {"progressToken": token, "progress": 0, "total": 1},
+                }
+
+            # Groups that aren't read-only have a single call, so it runs alone
+            tasks.append(asyncio.ensure_future(process_request(serializer, item)))
+
+        for task in tasks:
+            while not task.done():
+                done, _ = await asyncio.wait(
+                    {task}, timeout=settings.MCP_STREAM_KEEPALIVE
+                )
+                if not done:
+                    yield None
+
+            response_data = task.result().response_data
+            if response_data:
+                yield response_data
+
+
+async def iter_sse(serializer, items):
+    async for message in iter_messages(serializer, items):
+        yield ": keepalive\n\n" if message is None else sse_event(message)
@@ -0,0 +1,96 @@
+import base64
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from common.models import SiteAsset
+from mcp.registry import registry
+from pages.models import HomePageSection
+from posts.models import PostDetail
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    MCP_INLINE_ASSET_MAX_SIZE=100,
+    MCP_INLINE_ASSETS_MAX_TOTAL=150,
+    MCP_ASSET_CHUNK_SIZE=64,
+)
+class TestAssetContent(TestCase):
+    def setUp(self):
+        self.post = PostDetail.objects.create(permalink="post", heading="Post")
+
+    def create_asset(self, name, data, **kwargs):
+        return SiteAsset.objects.create(
+            key=name.replace(".", "_"),
+            file=ContentFile(data, name=name),
+            **kwargs,
+        )
+
+    def call(self, tool, **kwargs):
+        return registry.tools_container.call(tool, **kwargs)
+
+    def test_small_assets_are_embedded_and_large_ones_linked(self):
+        self.create_asset("small.css", b".a {}", post=self.post)
+        large = self.create_asset("large.png", bytes(range(256)) * 2, post=self.post)
+
+        content = self.call("get_post", permalink="post")["content"]
+        embedded, link = content
+
+        self.assertEqual(embedded["type"], "resource")
+        self.assertEqual(embedded["resource"]["text"], ".a {}")
+        self.assertEqual(link["type"], "resource_link")
+        self.assertEqual(link["mimeType"], "image/png")
+        self.assertEqual(link["annotations"]["size"], 512)
+        self.assertTrue(link["uri"].endswith(large.file.url))
+
+    def test_inline_total_is_bounded_per_response(self):
+        section = HomePageSection.objects.create(name="intro")
+        for n in range(3):
+            self.create_asset(f"style{n}.css", b"x" * 60, homepage_section=section)
+
+        content = self.call("get_homepage_section", name="intro")["content"]
+
+        self.assertEqual(
+            [item["type"] for item in content],
+            ["resource", "resource", "resource_link"],
+        )
+
+    def test_read_asset_in_chunks(self):
+        data = bytes(range(256)) * 2
+        asset = self.create_asset("large.png", data, post=self.post)
+        uri = self.call("get_post", permalink="post")["content"][0]["uri"]
+
+        chunks = []
+        offset = 0
+        while offset is not None:
+            result = self.call("read_site_asset", uri=uri, offset=offset)
+            chunk = result["structuredContent"]
+            self.assertLessEqual(chunk["length"], 64)
+            chunks.append(base64.b64decode(result["content"][0]["resource"]["blob"]))
+            offset = chunk.get("next_offset")
+
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(
+            chunk["etag"],
+            self.call("read_site_asset", uri=asset.file.name)["structuredContent"][
+                "etag"
+            ],
+        )
+
+    def test_text_chunks_end_on_whole_characters(self):
+        asset = self.create_asset("notes.txt", "é".encode() * 40, post=self.post)
+
+        text = ""
+        offset = 0
+        while offset is not None:
+            result = self.call("read_site_asset", uri=asset.file.name, offset=offset)
+            text += result["content"][0]["resource"]["text"]
+            offset = result["structuredContent"].get("next_offset")
+
+        self.assertEqual(text, "é" * 40)
+
+    def test_read_unknown_asset(self):
+        result = self.call("read_site_asset", uri="missing.css")
+
+        self.assertTrue(result["isError"])
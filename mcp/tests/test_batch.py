@@ -0,0 +1,79 @@
+import threading
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from mcp import batch
+from mcp.views import mcp_serializer
+from posts.models import PostDetail
+
+
+def tool_call(id, name, **arguments):
+    return {
+        "jsonrpc": "2.0",
+        "id": id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    }
+
+
+# Threads use their own connections, so the data has to be committed
+@override_settings(MCP_BATCH_MAX_WORKERS=4)
+class TestBatch(TransactionTestCase):
+    def setUp(self):
+        PostDetail.objects.create(
+            permalink="first", heading="First", content="<p>1</p>"
+        )
+
+    def test_reads_run_concurrently_and_writes_in_order(self):
+        threads = {}
+        process = batch.process_request_in_thread
+
+        def record_thread(serializer, item):
+            threads[item["id"]] = threading.current_thread().name
+            return process(serializer, item)
+
+        items = [
+            tool_call(1, "get_post", permalink="first"),
+            tool_call(2, "list_posts", view="summary"),
+            tool_call(
+                3,
+                "create_post",
+                permalink="second",
+                heading="Second",
+                content="<p>2</p>",
+                tags='[["news", "white", "black"]]',
+            ),
+            tool_call(4, "get_post", permalink="second"),
+            tool_call(5, "list_posts", view="summary"),
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        ]
+        with mock.patch.object(batch, "process_request_in_thread", record_thread):
+            context = batch.process_batch(mcp_serializer, items)
+
+        responses = context.response_data
+        self.assertEqual([response["id"] for response in responses], [1, 2, 3, 4, 5])
+        self.assertEqual(set(threads), {1, 2, 4, 5})
+        self.assertTrue(all(name.startswith("mcp-batch") for name in threads.values()))
+
+        self.assertEqual(
+            responses[3]["result"]["structuredContent"]["permalink"], "second"
+        )
+        self.assertEqual(
+            len(responses[1]["result"]["structuredContent"]["post_list"]), 1
+        )
+        self.assertEqual(
+            len(responses[4]["result"]["structuredContent"]["post_list"]), 2
+        )
+
+    def test_read_only_calls(self):
+        registry = mcp_serializer.registry
+
+        self.assertTrue(batch.is_read_only(registry, tool_call(1, "get_post")))
+        self.assertTrue(batch.is_read_only(registry, {"id": 1, "method": "tools/list"}))
+        self.assertFalse(batch.is_read_only(registry, tool_call(1, "update_post")))
+        self.assertFalse(batch.is_read_only(registry, tool_call(1, "unknown")))
+        self.assertFalse(batch.is_read_only(registry, {"method": "tools/list"}))
+        self.assertFalse(
+            batch.is_read_only(registry, {"id": 1, "method": "initialize"})
+        )
@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from mcp.registry import registry
+from pages.models import HomePageSection, StaticPage
+from posts.models import PostDetail, PostTag
+
+
+class TestListSerializers(TestCase):
+    def setUp(self):
+        tags = [PostTag.objects.create(label=f"tag{n}") for n in range(3)]
+        for n in range(10):
+            post = PostDetail.objects.create(
+                permalink=f"post_{n}", heading=f"Post {n}", content="<p>Body</p>"
+            )
+            post.tags.set(tags[: n % 3 + 1])
+        StaticPage.objects.create(
+            permalink="about", heading="About", content="<p>Hi</p>"
+        )
+        HomePageSection.objects.create(name="intro", content="<p>Hi</p>")
+
+    def call(self, name, **kwargs):
+        result = registry.tools_container.call(name, **kwargs)
+        return result.get("structuredContent", result)
+
+    def test_list_posts_prefetches_tags(self):
+        with self.assertNumQueries(2):
+            posts = self.call("list_posts")
+
+        self.assertEqual(len(posts["post_list"]), 10)
+        post = next(
+            post for post in posts["post_list"] if post["permalink"] == "post_2"
+        )
+        self.assertEqual(sorted(post["tags"]), ["tag0", "tag1", "tag2"])
+        self.assertEqual(post["content"], "<p>Body</p>")
+
+    def test_list_posts_respects_filters_and_limit(self):
+        with self.assertNumQueries(2):
+            posts = self.call("list_posts", limit=4)
+        self.assertEqual(len(posts["post_list"]), 4)
+
+        tag = PostTag.objects.get(label="tag2")
+        posts = self.call("list_posts", tag_id=tag.pk)
+        self.assertEqual(len(posts["post_list"]), 3)
+
+    def test_summary_view_leaves_out_content(self):
+        posts = self.call("list_posts", view="summary")["post_list"]
+        pages = self.call("list_pages", view="summary")["page_list"]
+        sections = self.call("list_homepage_sections", view="summary")["section_list"]
+
+        for item in posts + pages + sections:
+            self.assertNotIn("content", item)
+        self.assertTrue(all(post["tags"] for post in posts))
+
+    def test_unknown_view_is_an_error(self):
+        for name in ("list_posts", "list_pages", "list_homepage_sections"):
+            result = self.call(name, view="full")
+
+            self.assertTrue(result["isError"])
+            self.assertIn("Unknown view 'full'", result["content"][0]["text"])
@@ -0,0 +1,63 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from oauth2_provider.models import AccessToken, Application
+
+from mcp.tokens import get_token_key
+
+
+@override_settings(LOGGED_URLS=[])
+class TestTokenCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user("admin")
+        self.application = Application.objects.create(
+            name="client",
+            client_type=Application.CLIENT_PUBLIC,
+            authorization_grant_type=Application.GRANT_AUTHORIZATION_CODE,
+        )
+        self.token = AccessToken.objects.create(
+            user=user,
+            application=self.application,
+            token="secret",
+            scope="read write",
+            expires=timezone.now() + timedelta(hours=1),
+        )
+
+    def list_tools(self):
+        return self.client.post(
+            reverse("mcp"),
+            json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}),
+            content_type="application/json",
+            headers={"Authorization": "Bearer secret"},
+        )
+
+    def test_repeat_requests_skip_token_lookup(self):
+        self.assertEqual(self.list_tools().status_code, 200)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.list_tools().status_code, 200)
+
+    def test_revoked_token_is_rejected_immediately(self):
+        self.list_tools()
+        self.token.revoke()
+
+        self.assertEqual(self.list_tools().status_code, 401)
+
+    def test_expired_token_is_verified_again(self):
+        self.list_tools()
+        self.token.expires = timezone.now() - timedelta(seconds=1)
+        self.token.save()
+
+        self.assertEqual(self.list_tools().status_code, 401)
+
+    def test_cached_token_is_keyed_by_hash(self):
+        self.list_tools()
+
+        self.assertIsNotNone(cache.get(get_token_key("secret")))
+        self.assertNotIn("secret", get_token_key("secret"))
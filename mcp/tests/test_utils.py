@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+
+from mcp.registry import registry
+from mcp.utils import InvalidCursor, paginate_queryset
+from pages.models import StaticPage
+from posts.models import PostDetail
+
+
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        # Ties on feature and null publish dates in both directions
+        for n in range(11):
+            PostDetail.objects.create(
+                permalink=f"post_{n}",
+                heading=f"Post {n}",
+                content="<p>Body</p>",
+                feature=n % 2,
+                publish_date=None
+                if n % 3 == 0
+                else date(2024, 1, 1) + timedelta(n % 4),
+            )
+
+    def call(self, name, **kwargs):
+        result = registry.tools_container.call(name, **kwargs)
+        return result.get("structuredContent", result)
+
+    def collect(self, queryset, page_size):
+        objects, cursor = paginate_queryset(queryset, page_size=page_size)
+        while cursor:
+            page, cursor = paginate_queryset(queryset, cursor, page_size)
+            objects += page
+        return objects
+
+    def test_pages_cover_every_row_once_in_order(self):
+        queryset = PostDetail.objects.all()
+        expected = sorted(
+            queryset,
+            key=lambda post: (
+                -post.feature,
+                post.publish_date is None,
+                -(post.publish_date or date.min).toordinal(),
+                -post.created.timestamp(),
+                post.pk,
+            ),
+        )
+
+        for page_size in (1, 3, 4, 11, 20):
+            self.assertEqual(self.collect(queryset, page_size), expected)
+
+    def test_pages_follow_queryset_ordering(self):
+        queryset = PostDetail.objects.order_by("-publish_date", "permalink")
+        permalinks = [post.permalink for post in self.collect(queryset, 2)]
+
+        self.assertEqual(len(permalinks), 11)
+        self.assertEqual(len(set(permalinks)), 11)
+        self.assertEqual(permalinks[-4:], ["post_0", "post_3", "post_6", "post_9"])
+
+    def test_invalid_cursor(self):
+        queryset = PostDetail.objects.all()
+        _, cursor = paginate_queryset(queryset, page_size=2)
+
+        with self.assertRaises(InvalidCursor):
+            paginate_queryset(queryset, "not a cursor", 2)
+        with self.assertRaises(InvalidCursor):
+            paginate_queryset(StaticPage.objects.all(), cursor, 2)
+
+    @override_settings(MCP_PAGE_SIZE=4, MCP_MAX_PAGE_SIZE=5)
+    def test_list_posts_pages_with_next_cursor(self):
+        permalinks = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(2):
+                response = self.call("list_posts", view="summary", cursor=cursor)
+            permalinks += [post["permalink"] for post in response["post_list"]]
+            cursor = response.get("next_cursor")
+            if not cursor:
+                break
+
+        self.assertEqual(len(permalinks), 11)
+        self.assertEqual(len(set(permalinks)), 11)
+        self.assertEqual(len(self.call("list_posts", limit=100)["post_list"]), 5)
+        self.assertEqual(len(self.call("list_posts", limit=-3)["post_list"]), 1)
+        self.assertTrue(self.call("list_posts", cursor="bad")["isError"])
@@ -0,0 +1,100 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from oauth2_provider.models import AccessToken, Application
+
+from posts.models import PostDetail
+
+
+def tool_call(id, name, **arguments):
+    return {
+        "jsonrpc": "2.0",
+        "id": id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    }
+
+
+def parse_events(content):
+    return [
+        json.loads(line[len("data: ") :])
+        for line in content.decode().splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+# Calls run on their own threads and connections, so the data has to be committed
+@override_settings(LOGGED_URLS=[])
+class TestAsyncMcpView(TransactionTestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("admin")
+        application = Application.objects.create(
+            name="client",
+            client_type=Application.CLIENT_PUBLIC,
+            authorization_grant_type=Application.GRANT_AUTHORIZATION_CODE,
+        )
+        self.token = AccessToken.objects.create(
+            user=user,
+            application=application,
+            token="secret",
+            scope="read write",
+            expires=timezone.now() + timedelta(hours=1),
+        )
+        PostDetail.objects.create(
+            permalink="first", heading="First", content="<p>1</p>"
+        )
+        self.url = reverse("mcp-stream")
+
+    async def post(self, data, accept="application/json, text/event-stream"):
+        return await self.async_client.post(
+            self.url,
+            json.dumps(data),
+            content_type="application/json",
+            headers={"Authorization": "Bearer secret", "Accept": accept},
+        )
+
+    async def test_requires_token(self):
+        response = await self.async_client.post(
+            self.url, "{}", content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    async def test_streams_batch_responses_as_events(self):
+        call = tool_call(2, "get_post", permalink="first")
+        call["params"]["_meta"] = {"progressToken": "p2"}
+        response = await self.post([tool_call(1, "list_posts", view="summary"), call])
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = parse_events(b"".join([chunk async for chunk in response]))
+        self.assertEqual(events[0]["method"], "notifications/progress")
+        self.assertEqual(events[0]["params"]["progressToken"], "p2")
+        self.assertEqual([event.get("id") for event in events[1:]], [1, 2])
+        self.assertEqual(events[2]["result"]["structuredContent"]["permalink"], "first")
+
+    async def test_json_response_without_event_stream(self):
+        response = await self.post(
+            tool_call(1, "get_post", permalink="first"), accept="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], 1)
+
+    async def test_notifications_are_accepted(self):
+        response = await self.post(
+            {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        )
+
+        self.assertEqual(response.status_code, 202)
+
+    async def test_get_has_no_stream(self):
+        response = await self.async_client.get(
+            self.url, headers={"Authorization": "Bearer secret"}
+        )
+
+        self.assertEqual(response.status_code, 405)
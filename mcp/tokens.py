@@ -0,0 +1,88 @@
+"""
+Cache of verified OAuth access tokens for the MCP views.
+
+An agent session sends many MCP requests with the same bearer token, each verified by
+loading the token with its application and user. A verified token is cached for
+OAUTH_TOKEN_CACHE_TIMEOUT seconds, at most until it expires, under a hash of the token.
+The cache entry is dropped as soon as the token is changed or deleted, which is how
+tokens are revoked.
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+TOKEN_KEY = "oauth-token:{}"
+
+
+def get_token_key(token):
+    return TOKEN_KEY.format(hashlib.sha256(token.encode()).hexdigest())
+
+
+def get_bearer_token(request):
+    auth = request.headers.get("Authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        return token.strip()
+    return None
+
+
+def cache_token(token, access_token):
+    expires_in = (access_token.expires - timezone.now()).total_seconds()
+    timeout = min(settings.OAUTH_TOKEN_CACHE_TIMEOUT, int(expires_in))
+    if timeout <= 0:
+        return
+
+    cache.set(
+        get_token_key(token),
+        {
+            "user_id": access_token.user_id,
+            "scopes": access_token.scope.split(),
+            "expires": access_token.expires.timestamp(),
+        },
+        timeout,
+    )
+
+
+def get_cached_token(token, scopes):
+    """The cached verification of a token, None when it has to be verified again."""
+    data = cache.get(get_token_key(token))
+    if (
+        data is None
+        or data["expires"] <= timezone.now().timestamp()
+        or not set(scopes).issubset(data["scopes"])
+    ):
+        return None
+
+    user = None
+    if data["user_id"] is not None:
+        # Tools don't use the user, only load it when it's read
+        user = SimpleLazyObject(
+            lambda: get_user_model().objects.get(pk=data["user_id"])
+        )
+    return SimpleNamespace(user=user, scopes=data["scopes"])
+
+
+def invalidate_token(token):
+    cache.delete(get_token_key(token))
+
+
+class CachedTokenMixin:
+    """Verifies the bearer token of a request from the cache when it can."""
+
+    def verify_request(self, request):
+        token = get_bearer_token(request)
+        if token:
+            cached = get_cached_token(token, self.get_scopes())
+            if cached is not None:
+                return True, cached
+
+        valid, r = super().verify_request(request)
+        if valid and token and getattr(r, "access_token", None) is not None:
+            cache_token(token, r.access_token)
+        return valid, r
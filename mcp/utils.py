@@ -0,0 +1,267 @@
+import base64
+import binascii
+import codecs
+import hashlib
+import json
+import mimetypes
+import os
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+from common.utils import get_full_url
+
+TEXT_MIME_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_keyset_ordering(queryset):
+    """Ordering of the queryset as (field, descending) pairs, ending with the pk.
+
+    The pk makes every position in the ordering unique, so a cursor points between
+    two rows even when the ordering values of rows are equal.
+    """
+    names = queryset.query.order_by or queryset.model._meta.ordering or ()
+    ordering = []
+    for name in names:
+        if not isinstance(name, str):
+            raise ValueError(f"Keyset pagination needs field names, got {name!r}")
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        ordering.append(("pk" if name == "id" else name, descending))
+
+    if not any(name == "pk" for name, _ in ordering):
+        ordering.append(("pk", False))
+    return ordering
+
+
+def _get_field(model, name):
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def encode_cursor(ordering, obj):
+    values = []
+    for name, _ in ordering:
+        field = _get_field(type(obj), name)
+        value = getattr(obj, field.attname)
+        values.append(None if value is None else field.value_to_string(obj))
+
+    data = json.dumps({"o": _ordering_key(ordering), "v": values})
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(ordering, model, cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["o"] != _ordering_key(ordering) or len(data["v"]) != len(ordering):
+            raise InvalidCursor("The cursor belongs to a different listing")
+        return [
+            None if value is None else _get_field(model, name).to_python(value)
+            for (name, _), value in zip(ordering, data["v"])
+        ]
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as e:
+        raise InvalidCursor("The cursor is not valid") from e
+
+
+def _ordering_key(ordering):
+    return ",".join(
+        f"{'-' if descending else ''}{name}" for name, descending in ordering
+    )
+
+
+def _after(model, ordering, values):
+    """Rows that come after the cursor position, nulls sort last in either direction."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending), value in zip(ordering, values):
+        nullable = _get_field(model, name).null
+        if value is None:
+            # Only other nulls can follow a null
+            beyond = Q(pk__in=[])
+            same = Q(**{f"{name}__isnull": True})
+        else:
+            beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if nullable:
+                beyond |= Q(**{f"{name}__isnull": True})
+            same = Q(**{name: value})
+
+        condition |= equal & beyond
+        equal &= same
+    return condition
+
+
+def get_page_size(limit=None):
+    """The requested page size, at least 1 and at most MCP_MAX_PAGE_SIZE."""
+    return max(1, min(limit or settings.MCP_PAGE_SIZE, settings.MCP_MAX_PAGE_SIZE))
+
+
+def paginate_queryset(queryset, cursor=None, page_size=50):
+    """One page of a queryset by keyset pagination over its ordering.
+
+    Each page is a single indexed range query whatever its depth, unlike OFFSET
+    which scans every skipped row. Returns the objects and the cursor of the next
+    page, which is None on the last page.
+
+    Raises InvalidCursor if the cursor can't be used for this queryset.
+    """
+    ordering = get_keyset_ordering(queryset)
+    model = queryset.model
+    queryset = queryset.order_by(
+        *[
+            F(name).desc(nulls_last=True)
+            if descending
+            else F(name).asc(nulls_last=True)
+            for name, descending in ordering
+        ]
+    )
+
+    if cursor:
+        values = decode_cursor(ordering, model, cursor)
+        queryset = queryset.filter(_after(model, ordering, values))
+
+    objects = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(objects) > page_size:
+        objects = objects[:page_size]
+        next_cursor = encode_cursor(ordering, objects[-1])
+    return objects, next_cursor
+
+
+def get_asset_metadata(asset):
+    """Size, mime type and etag of an asset file without reading it.
+
+    The size is None when the file is missing from the storage.
+    """
+    storage = asset.file.storage
+    name = asset.file.name
+    try:
+        size = storage.size(name)
+    except OSError:
+        size = None
+    try:
+        modified = storage.get_modified_time(name)
+    except (OSError, NotImplementedError):
+        modified = None
+
+    etag = hashlib.md5(f"{name}:{size}:{modified}".encode()).hexdigest()
+    return {
+        "uri": get_full_url(asset.file.url),
+        "name": os.path.basename(name),
+        "size": size,
+        "mime_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+        "etag": f'W/"{etag}"',
+        "last_modified": modified.isoformat() if modified else None,
+    }
+
+
+def is_text_mime_type(mime_type):
+    return mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES
+
+
+class AssetBudget:
+    """Embeds small assets inline and links the rest, bounding the response size.
+
+    An asset is embedded when it is at most MCP_INLINE_ASSET_MAX_SIZE bytes and fits
+    in what is left of MCP_INLINE_ASSETS_MAX_TOTAL for the response. Other assets are
+    returned as resource links with their metadata, to be fetched with their URL or
+    read in chunks with the read_site_asset tool.
+    """
+
+    def __init__(self):
+        self.remaining = settings.MCP_INLINE_ASSETS_MAX_TOTAL
+
+    def add(self, result, asset):
+        metadata = get_asset_metadata(asset)
+        size = metadata["size"]
+        title = asset.description or asset.key
+
+        if size is not None and size <= min(
+            settings.MCP_INLINE_ASSET_MAX_SIZE, self.remaining
+        ):
+            with asset.file.open("rb") as f:
+                data = f.read()
+            self.remaining -= size
+
+            if is_text_mime_type(metadata["mime_type"]):
+                text, blob = data.decode("utf-8", errors="replace"), None
+            else:
+                text, blob = None, base64.b64encode(data).decode()
+            return result.add_embedded_resource(
+                uri=metadata["uri"],
+                text=text,
+                blob=blob,
+                mime_type=metadata["mime_type"],
+                name=metadata["name"],
+                title=title,
+            )
+
+        return result.add_resource_link(
+            uri=metadata["uri"],
+            name=metadata["name"],
+            title=title,
+            description=(
+                f"{metadata['size']} bytes, too large to embed. "
+                "Read it in chunks with the read_site_asset tool."
+            ),
+            mime_type=metadata["mime_type"],
+            annotations={
+                "size": metadata["size"],
+                "etag": metadata["etag"],
+                "lastModified": metadata["last_modified"],
+            },
+        )
+
+
+def get_asset_name_from_uri(uri):
+    """The storage name of an asset from its URL, or the name itself."""
+    path = unquote(urlsplit(uri).path)
+    media_path = urlsplit(settings.MEDIA_URL).path
+    if path.startswith(media_path):
+        return path[len(media_path) :]
+    return path.lstrip("/")
+
+
+def read_asset_chunk(asset, offset=0, length=None):
+    """Read a byte range of an asset, text chunks end on a whole character.
+
+    Returns the metadata of the asset with the chunk as text or base64 blob, and
+    next_offset to continue from, which is None after the last chunk.
+    """
+    metadata = get_asset_metadata(asset)
+    length = min(length or settings.MCP_ASSET_CHUNK_SIZE, settings.MCP_ASSET_CHUNK_SIZE)
+
+    with asset.file.open("rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    end = offset + len(data)
+    is_last = metadata["size"] is None or end >= metadata["size"]
+
+    text = blob = None
+    if is_text_mime_type(metadata["mime_type"]):
+        # Leave a character split by the range to the next chunk
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        text = decoder.decode(data, final=is_last)
+        end -= len(decoder.getstate()[0])
+    else:
+        blob = base64.b64encode(data).decode()
+
+    return {
+        **metadata,
+        "offset": offset,
+        "length": end - offset,
+        "next_offset": None if is_last else end,
+        "text": text,
+        "blob": blob,
+    }
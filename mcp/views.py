@@ -1,19 +1,24 @@
 from logging import getLogger
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.views import View
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
 from mcp_serializer.initializer import MCPInitializer
 from mcp_serializer.serializers import MCPSerializer
 from oauth2_provider.views.generic import ProtectedResourceView
+from oauth2_provider.views.mixins import OAuthLibMixin
 from oauth2_provider.models import Application
 import json
 import secrets
 
+from .batch import process_batch
 from .registry import registry
+from .streaming import iter_messages, iter_sse, needs_response, process_request
+from .tokens import CachedTokenMixin
 
 mcp_initializer = MCPInitializer(protocol_version="2025-06-18")
 mcp_initializer.add_server_info(
@@ -33,7 +38,7 @@ mcp_serializer = MCPSerializer(
 _logger = getLogger(__name__)
 
 
-class McpView(ProtectedResourceView):
+class McpView(CachedTokenMixin, ProtectedResourceView):
     """
     MCP View with OAuth 2.0 authentication.
     Returns 401 with WWW-Authenticate header when authentication fails.
@@ -66,7 +71,15 @@ class McpView(ProtectedResourceView):
         Handle POST requests
         """
         request_data = request.body.decode("utf-8")
-        response_context = mcp_serializer.process_request(request_data)
+        try:
+            items = json.loads(request_data)
+        except json.JSONDecodeError:
+            items = None
+
+        if isinstance(items, list) and items:
+            response_context = process_batch(mcp_serializer, items)
+        else:
+            response_context = mcp_serializer.process_request(request_data)
         response_data = response_context.response_data
 
         # Having no resoponse data means only received notification
@@ -85,6 +98,82 @@ class McpView(ProtectedResourceView):
         return JsonResponse(response_data, status=200, safe=False)
 
 
+class AsyncMcpView(CachedTokenMixin, OAuthLibMixin, View):
+    """
+    Async MCP View with OAuth 2.0 authentication, for ASGI servers.
+    Supports the Streamable HTTP transport: responses are sent as server-sent events
+    when the client accepts text/event-stream, as JSON otherwise.
+    """
+
+    http_method_names = ["get", "post", "options"]
+
+    @method_decorator(csrf_exempt)
+    async def dispatch(self, request, *args, **kwargs):
+        # Let preflight OPTIONS requests pass
+        if request.method.upper() == "OPTIONS":
+            return await super().dispatch(request, *args, **kwargs)
+
+        valid, r = await sync_to_async(self.verify_request)(request)
+        if valid:
+            request.resource_owner = r.user
+            return await super().dispatch(request, *args, **kwargs)
+        else:
+            # The WWW-Authenticate header is added by WWWAuthenticateMiddleware
+            return JsonResponse(
+                {
+                    "error": "unauthorized",
+                    "error_description": "Authentication required",
+                },
+                status=401,
+            )
+
+    async def get(self, request, *args, **kwargs):
+        """
+        The server doesn't send messages outside of responses, so there is no stream
+        to open with GET.
+        """
+        return HttpResponse(status=405, headers={"Allow": "POST"})
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests
+        """
+        request_data = request.body.decode("utf-8")
+        try:
+            items = json.loads(request_data)
+        except json.JSONDecodeError:
+            items = None
+
+        # Invalid requests get their error response from the serializer
+        if not isinstance(items, (list, dict)) or not items:
+            response_context = await process_request(mcp_serializer, request_data)
+            return JsonResponse(response_context.response_data, safe=False)
+
+        is_batch = isinstance(items, list)
+        items = items if is_batch else [items]
+
+        # Having nothing to respond to means only notifications were received
+        if not any(needs_response(item) for item in items):
+            async for _ in iter_messages(mcp_serializer, items):
+                pass
+            _logger.info(f"MCP Notifications: {len(items)} received.")
+            return HttpResponse(status=202)
+
+        if "text/event-stream" in request.headers.get("Accept", ""):
+            return StreamingHttpResponse(
+                iter_sse(mcp_serializer, items),
+                content_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        response_data = [
+            message
+            async for message in iter_messages(mcp_serializer, items)
+            if message is not None and "id" in message
+        ]
+        return JsonResponse(response_data if is_batch else response_data[0], safe=False)
+
+
 class OAuthProtectedResourceMetadataView(View):
     """
     OAuth 2.0 Protected Resource Metadata endpoint
@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pages", "0005_homepagesection_is_active"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="homepagesection",
+            name="rendered_content",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                help_text="The 'content' field rendered at save time. Served while its fingerprint is current.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="homepagesection",
+            name="rendered_fingerprint",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Hash of the content and assets 'rendered_content' was rendered from.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="staticpage",
+            name="rendered_content",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                help_text="The 'content' field rendered at save time. Served while its fingerprint is current.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="staticpage",
+            name="rendered_fingerprint",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Hash of the content and assets 'rendered_content' was rendered from.",
+                max_length=64,
+            ),
+        ),
+    ]
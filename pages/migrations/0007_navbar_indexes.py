@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pages", "0006_homepagesection_rendered_content_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="homepagesection",
+            index=models.Index(fields=["serial", "created"], name="section_order_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="staticpage",
+            index=models.Index(
+                fields=["navbar_serial", "created", "is_published"],
+                name="page_navbar_idx",
+            ),
+        ),
+    ]
@@ -20,6 +20,9 @@ class HomePageSection(TimeStampedModel, AbstractRenderableContent):
 
     class Meta:
         ordering = ("serial", "created")
+        indexes = [
+            models.Index(fields=["serial", "created"], name="section_order_idx"),
+        ]
 
 
 class StaticPage(TimeStampedModel, AbstractRenderableContent):
@@ -42,3 +45,12 @@ class StaticPage(TimeStampedModel, AbstractRenderableContent):
 
     def __str__(self) -> str:
         return f"{self.permalink}: {self.heading}"
+
+    class Meta:
+        # The navbar lists published pages with a title in this order
+        indexes = [
+            models.Index(
+                fields=["navbar_serial", "created", "is_published"],
+                name="page_navbar_idx",
+            ),
+        ]
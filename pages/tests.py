@@ -1,3 +1,62 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from common.models import SiteAsset
+from .models import HomePageSection
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestHomePageView(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def add_sections(self, count):
+        for _ in range(count):
+            section = HomePageSection.objects.create(
+                name=f"section{HomePageSection.objects.count()}",
+                content="<p>{{ banner.url }}</p>",
+                requires_rendering=True,
+            )
+            SiteAsset.objects.create(
+                key="banner",
+                file=ContentFile(b"png", name="banner.png"),
+                homepage_section=section,
+                is_static=False,
+            )
+            SiteAsset.objects.create(
+                key="style",
+                file=ContentFile(b"p {}", name="style.css"),
+                homepage_section=section,
+            )
+
+    def count_queries(self):
+        # Warm up, stale renderings are stored by the first request
+        self.client.get(reverse("home"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_sections(self):
+        self.add_sections(2)
+        queries_for_two = self.count_queries()
+
+        self.add_sections(4)
+        self.assertEqual(self.count_queries(), queries_for_two)
+
+    def test_sections_render_their_own_assets(self):
+        self.add_sections(2)
+        response = self.client.get(reverse("home"))
+
+        for section in HomePageSection.objects.all():
+            banner = section.siteasset_set.get(key="banner")
+            style = section.siteasset_set.get(key="style")
+            self.assertContains(response, f"<p>{banner.file.url}</p>")
+            self.assertContains(response, style.file.url)
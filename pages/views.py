@@ -1,15 +1,24 @@
 from django.views.generic import ListView, DetailView
 
 from common.mixins import (
+    ConditionalGetMixin,
+    PageCacheMixin,
     SiteContextMixin,
     MultipleObjectContentRendererMixin,
     SingleObjectContentRendererMixin,
 )
-from common.models import SiteAsset
+from common.versions import PAGES_VERSION, SITE_VERSION
 from .models import HomePageSection, StaticPage
 
 
-class HomePageView(ListView, SiteContextMixin, MultipleObjectContentRendererMixin):
+class HomePageView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    ListView,
+    SiteContextMixin,
+    MultipleObjectContentRendererMixin,
+):
+    content_versions = [SITE_VERSION, PAGES_VERSION]
     template_name = "pages/homepage.html"
     is_homepage = True
     context_object_name = "sections"
@@ -19,31 +28,19 @@ class HomePageView(ListView, SiteContextMixin, MultipleObjectContentRendererMixi
         extras = super().get_extra_statics()
 
         # Add assets for all active homepage sections
-        active_sections = HomePageSection.objects.filter(is_active=True)
-        for section in active_sections:
-            extras.extend(
-                [
-                    asset.file.url
-                    for asset in SiteAsset.objects.filter(
-                        homepage_section=section, is_active=True, is_static=True
-                    )
-                ]
-            )
+        active_sections = [section for section in self.object_list if section.is_active]
+        extras.extend(self.get_asset_resolver().get_static_urls(active_sections))
         return extras
 
-    def get_content_context_data(self, obj):
-        context = super().get_content_context_data(obj)
-
-        # Add non-static assets for this section as context variables
-        for asset in SiteAsset.objects.filter(
-            homepage_section=obj, is_active=True, is_static=False
-        ):
-            context[asset.key] = asset.file
-
-        return context
-
 
-class StaticPageView(DetailView, SiteContextMixin, SingleObjectContentRendererMixin):
+class StaticPageView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    DetailView,
+    SiteContextMixin,
+    SingleObjectContentRendererMixin,
+):
+    content_versions = [SITE_VERSION, PAGES_VERSION]
     template_name = "pages/staticpage.html"
     model = StaticPage
     context_object_name = "page"
@@ -57,22 +54,5 @@ class StaticPageView(DetailView, SiteContextMixin, SingleObjectContentRendererMi
         extras.extend(["pages/prism.css", "pages/prism.js"])
 
         # add assets for this page
-        extras.extend(
-            [
-                asset.file.url
-                for asset in SiteAsset.objects.filter(
-                    page=self.object, is_active=True, is_static=True
-                )
-            ]
-        )
+        extras.extend(self.get_asset_resolver().get_static_urls([self.object]))
         return extras
-
-    def get_content_context_data(self, obj):
-        context = super().get_content_context_data(obj)
-
-        for asset in SiteAsset.objects.filter(
-            page=obj, is_active=True, is_static=False
-        ):
-            context[asset.key] = asset.file
-
-        return context
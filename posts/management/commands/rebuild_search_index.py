@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import index_posts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index of every post."
+
+    def handle(self, *args, **options):
+        count = index_posts()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} posts."))
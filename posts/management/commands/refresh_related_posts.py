@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.related import refresh_related_posts
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored related posts of every post."
+
+    def handle(self, *args, **options):
+        count = refresh_related_posts()
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed related posts of {count} posts.")
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0008_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="postdetail",
+            index=models.Index(
+                fields=["-feature", "-publish_date", "-created", "is_published"],
+                name="post_featured_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="postdetail",
+            index=models.Index(
+                fields=["-publish_date", "-created", "is_published"],
+                name="post_latest_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="postdetail",
+            index=models.Index(
+                fields=[
+                    "-view_count",
+                    "-feature",
+                    "-publish_date",
+                    "-created",
+                    "is_published",
+                ],
+                name="post_viewed_idx",
+            ),
+        ),
+    ]
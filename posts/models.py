@@ -34,6 +34,30 @@ class PostDetail(TimeStampedModel, AbstractRenderableContent):
 
     class Meta:
         ordering = ["-feature", "-publish_date", "-created"]
+        # The post list reads published posts in one of these orders, oldest being
+        # latest backwards. Django tests booleans without "= true", which indexes
+        # can't seek, so is_published comes last: the list walks an index in order,
+        # skipping drafts without reading their rows, and stops at the page end.
+        indexes = [
+            models.Index(
+                fields=["-feature", "-publish_date", "-created", "is_published"],
+                name="post_featured_idx",
+            ),
+            models.Index(
+                fields=["-publish_date", "-created", "is_published"],
+                name="post_latest_idx",
+            ),
+            models.Index(
+                fields=[
+                    "-view_count",
+                    "-feature",
+                    "-publish_date",
+                    "-created",
+                    "is_published",
+                ],
+                name="post_viewed_idx",
+            ),
+        ]
 
 
 class PostTag(TimeStampedModel):
@@ -54,3 +78,66 @@ class PostTag(TimeStampedModel):
 
     class Meta:
         ordering = ["-created"]
+
+
+class RelatedPost(models.Model):
+    """A precomputed related post, maintained by posts.related."""
+
+    post = models.ForeignKey(
+        PostDetail, on_delete=models.CASCADE, related_name="related_links"
+    )
+    related = models.ForeignKey(
+        PostDetail, on_delete=models.CASCADE, related_name="related_to_links"
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.2f})"
+
+    class Meta:
+        ordering = ["post", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "related"], name="unique_related_post"
+            )
+        ]
+
+
+class SearchDocument(models.Model):
+    """The search index entry of a post, maintained by posts.search."""
+
+    post = models.OneToOneField(
+        PostDetail,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    # Number of indexed terms, for the length normalisation of BM25
+    length = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.post_id} ({self.length} terms)"
+
+
+class SearchPosting(models.Model):
+    """The occurrences of a term in a post, maintained by posts.search."""
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        PostDetail, on_delete=models.CASCADE, related_name="search_postings"
+    )
+    # Occurrences weighted by the field they are in
+    frequency = models.PositiveIntegerField()
+    positions = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.term} in {self.post_id} ({self.frequency})"
+
+    class Meta:
+        constraints = [
+            # Also the index terms are looked up by
+            models.UniqueConstraint(
+                fields=["term", "post"], name="unique_search_posting"
+            )
+        ]
@@ -0,0 +1,217 @@
+"""
+Related posts engine.
+
+Published posts are ranked by how many tags they share with a post (or by the Jaccard
+index of both tag sets), then boosted by their feature value and recency. The top
+RELATED_POSTS["limit"] neighbours of every post are stored as RelatedPost rows and
+recomputed whenever tags or posts change, so reading them is a plain indexed query.
+Saving a post only updates the lists of its neighbours it enters or leaves.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import PostDetail, RelatedPost
+
+DEFAULT_SETTINGS = {
+    # Number of related posts stored per post
+    "limit": 5,
+    # "shared": number of shared tags, "jaccard": shared tags / all tags of both posts
+    "metric": "shared",
+    # Score added per feature point of the related post
+    "feature_weight": 0.1,
+    # Score added to a post published today, halved every "recency_half_life" days
+    "recency_weight": 0.5,
+    "recency_half_life": 180,
+}
+
+# Posts processed at once when refreshing every post
+BATCH_SIZE = 500
+
+
+def get_related_posts_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "RELATED_POSTS", {})}
+
+
+def get_post_tags(post_ids):
+    """Return {post id: set of tag ids} for the given posts."""
+    post_tags = defaultdict(set)
+    for post_id, tag_id in PostDetail.tags.through.objects.filter(
+        postdetail_id__in=post_ids
+    ).values_list("postdetail_id", "posttag_id"):
+        post_tags[post_id].add(tag_id)
+
+    return post_tags
+
+
+def get_tag_neighbours(post_ids):
+    """Ids of the given posts and of every post sharing a tag with them."""
+    through = PostDetail.tags.through
+    tag_ids = through.objects.filter(postdetail_id__in=post_ids).values("posttag_id")
+
+    return set(post_ids) | set(
+        through.objects.filter(posttag_id__in=tag_ids).values_list(
+            "postdetail_id", flat=True
+        )
+    )
+
+
+def score_post(shared, tag_count, candidate_tag_count, candidate, options, today):
+    if options["metric"] == "jaccard":
+        similarity = shared / (tag_count + candidate_tag_count - shared)
+    else:
+        similarity = shared
+
+    published = candidate["publish_date"] or candidate["created"].date()
+    age = max((today - published).days, 0)
+    recency = 0.5 ** (age / options["recency_half_life"])
+
+    return (
+        similarity
+        + options["feature_weight"] * candidate["feature"]
+        + options["recency_weight"] * recency
+    )
+
+
+def compute_related_posts(post_ids):
+    """Return {post id: [(related post id, score), ...]} best match first."""
+    options = get_related_posts_settings()
+    today = timezone.now().date()
+    post_tags = get_post_tags(post_ids)
+
+    # Published posts sharing at least one tag, with the tags they share
+    candidate_tags = defaultdict(set)
+    for post_id, tag_id in PostDetail.tags.through.objects.filter(
+        posttag_id__in=set().union(*post_tags.values()),
+        postdetail__is_published=True,
+    ).values_list("postdetail_id", "posttag_id"):
+        candidate_tags[post_id].add(tag_id)
+
+    candidates = {
+        candidate["id"]: candidate
+        for candidate in PostDetail.objects.filter(pk__in=candidate_tags)
+        .annotate(tag_count=Count("tags"))
+        .values("id", "feature", "publish_date", "created", "tag_count")
+    }
+
+    related_posts = {}
+    for post_id in post_ids:
+        tags = post_tags.get(post_id, set())
+        scores = []
+        for candidate_id, candidate in candidates.items():
+            shared = len(tags & candidate_tags[candidate_id])
+            if candidate_id == post_id or not shared:
+                continue
+
+            score = score_post(
+                shared, len(tags), candidate["tag_count"], candidate, options, today
+            )
+            scores.append((candidate_id, score))
+
+        scores.sort(key=lambda item: (-item[1], -item[0]))
+        related_posts[post_id] = scores[: options["limit"]]
+
+    return related_posts
+
+
+def refresh_related_posts(post_ids=None):
+    """Recompute and store the related posts of the given posts, or of every post."""
+    if post_ids is None:
+        post_ids = PostDetail.objects.values_list("pk", flat=True).order_by("pk")
+
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        batch = post_ids[start : start + BATCH_SIZE]
+        related_posts = compute_related_posts(batch)
+
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id__in=batch).delete()
+            RelatedPost.objects.bulk_create(
+                RelatedPost(
+                    post_id=post_id, related_id=related_id, score=score, rank=rank
+                )
+                for post_id, scores in related_posts.items()
+                for rank, (related_id, score) in enumerate(scores)
+            )
+
+    return len(post_ids)
+
+
+def refresh_related_posts_of_saved_post(post_id):
+    """
+    Refresh the related posts after a post is saved, its tags unchanged.
+
+    The post's own related posts are recomputed. Of its neighbours, only the stored
+    lists it enters, moves in or leaves are updated in place; a neighbour is only
+    recomputed when the post falls out of its full list, as another post may take its
+    place. Returns the ids of the recomputed posts.
+    """
+    options = get_related_posts_settings()
+    post = (
+        PostDetail.objects.filter(pk=post_id)
+        .annotate(tag_count=Count("tags"))
+        .values("id", "feature", "publish_date", "created", "is_published", "tag_count")
+        .first()
+    )
+    if post is None:
+        return []
+
+    neighbour_ids = get_tag_neighbours([post_id]) - {post_id}
+    post_tags = get_post_tags(neighbour_ids | {post_id})
+    stored = defaultdict(list)
+    for row in RelatedPost.objects.filter(post_id__in=neighbour_ids):
+        stored[row.post_id].append(row)
+
+    today = timezone.now().date()
+    recomputed, updated = [post_id], {}
+    for neighbour_id in neighbour_ids:
+        rows = stored[neighbour_id]
+        scores = [
+            (row.related_id, row.score) for row in rows if row.related_id != post_id
+        ]
+        was_related = len(scores) < len(rows)
+        is_full = len(rows) >= options["limit"]
+        # Posts missing from a full list rank after its last one
+        last = max(((-row.score, -row.related_id) for row in rows), default=None)
+
+        if post["is_published"]:
+            tags = post_tags.get(neighbour_id, set())
+            score = score_post(
+                len(tags & post_tags[post_id]),
+                len(tags),
+                post["tag_count"],
+                post,
+                options,
+                today,
+            )
+            if not is_full or (-score, -post_id) <= last:
+                scores.append((post_id, score))
+            elif was_related:
+                recomputed.append(neighbour_id)
+                continue
+            else:
+                continue
+        elif not was_related:
+            continue
+        elif is_full:
+            recomputed.append(neighbour_id)
+            continue
+
+        scores.sort(key=lambda item: (-item[1], -item[0]))
+        updated[neighbour_id] = scores[: options["limit"]]
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=updated).delete()
+        RelatedPost.objects.bulk_create(
+            RelatedPost(
+                post_id=neighbour_id, related_id=related_id, score=score, rank=rank
+            )
+            for neighbour_id, scores in updated.items()
+            for rank, (related_id, score) in enumerate(scores)
+        )
+    refresh_related_posts(recomputed)
+    return recomputed
@@ -0,0 +1,215 @@
+"""
+Full-text search over posts.
+
+The heading, introduction and rendered content of every post are split into terms and
+stored in an inverted index: one SearchPosting row per term and post, with the
+positions of the term and its frequency weighted by field, and one SearchDocument row
+per post with its length. The index is updated whenever a post is saved, so a search
+only reads the postings of its terms through the (term, post) index, never the posts.
+
+Every term of a query must match, "quoted phrases" must match as consecutive terms.
+Matches are ranked with BM25.
+"""
+
+import html
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils.html import strip_tags
+
+from .models import PostDetail, SearchDocument, SearchPosting
+
+# Weight of an occurrence per field
+FIELD_WEIGHTS = (("heading", 3), ("introduction", 2), ("content", 1))
+# Position gap between fields, so phrases never match across two fields
+FIELD_GAP = 100
+
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that the "
+    "their then there these they this to was will with".split()
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Posts indexed at once when rebuilding the whole index
+BATCH_SIZE = 200
+
+TERM_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def normalise_text(text):
+    # Drop accents, so "café" is found with "cafe"
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def get_terms(text):
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in TERM_RE.findall(normalise_text(text))
+        if term not in STOP_WORDS
+    ]
+
+
+def get_html_terms(value):
+    return get_terms(html.unescape(strip_tags(value or "")))
+
+
+def get_post_text(post):
+    """The indexed text of each field of a post, the content as it is displayed."""
+    content = post.content
+    if post.requires_rendering and post.rendered_content is not None:
+        content = post.rendered_content
+    return {
+        "heading": post.heading,
+        "introduction": post.introduction,
+        "content": content,
+    }
+
+
+def get_postings(fields):
+    """Return ({term: (frequency, positions)}, length) of the fields of a post."""
+    frequencies = defaultdict(int)
+    positions = defaultdict(list)
+    position = length = 0
+    for field_name, weight in FIELD_WEIGHTS:
+        terms = get_html_terms(fields[field_name])
+        for offset, term in enumerate(terms):
+            frequencies[term] += weight
+            positions[term].append(position + offset)
+        position += len(terms) + FIELD_GAP
+        length += len(terms)
+
+    return {term: (frequencies[term], positions[term]) for term in frequencies}, length
+
+
+def index_posts(post_ids=None):
+    """Index the given posts, or every post, replacing their previous entries."""
+    if post_ids is None:
+        post_ids = PostDetail.objects.values_list("pk", flat=True).order_by("pk")
+
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        batch = post_ids[start : start + BATCH_SIZE]
+        posts = PostDetail.objects.filter(pk__in=batch).only(
+            "heading",
+            "introduction",
+            "content",
+            "rendered_content",
+            "requires_rendering",
+        )
+
+        documents, postings = [], []
+        for post in posts:
+            terms, length = get_postings(get_post_text(post))
+            documents.append(SearchDocument(post_id=post.pk, length=length))
+            postings.extend(
+                SearchPosting(
+                    term=term, post_id=post.pk, frequency=frequency, positions=positions
+                )
+                for term, (frequency, positions) in terms.items()
+            )
+
+        with transaction.atomic():
+            SearchPosting.objects.filter(post_id__in=batch).delete()
+            SearchDocument.objects.filter(post_id__in=batch).delete()
+            SearchDocument.objects.bulk_create(documents)
+            SearchPosting.objects.bulk_create(postings, batch_size=1000)
+
+    return len(post_ids)
+
+
+def parse_query(query):
+    """Split a query into phrases, lists of terms, a bare word being a phrase of one."""
+    phrases = []
+    for quoted, word in PHRASE_RE.findall(query or ""):
+        terms = get_terms(quoted or word)
+        if quoted and terms:
+            phrases.append(terms)
+        else:
+            phrases.extend([term] for term in terms)
+    return phrases
+
+
+def normalise_query(query):
+    """The canonical form of a query, queries with the same results share it."""
+    return " ".join(
+        f'"{" ".join(terms)}"' if len(terms) > 1 else terms[0]
+        for terms in parse_query(query)
+    )
+
+
+def _has_phrase(positions, terms):
+    return any(
+        all(start + offset in positions[term] for offset, term in enumerate(terms))
+        for start in positions[terms[0]]
+    )
+
+
+def search(query, published_only=True, limit=None):
+    """Return the (post id, score) pairs matching a query, the best first."""
+    phrases = parse_query(query)
+    terms = {term for terms in phrases for term in terms}
+    if not terms:
+        return []
+
+    documents = SearchDocument.objects.all()
+    postings = SearchPosting.objects.filter(term__in=terms)
+    if published_only:
+        documents = documents.filter(post__is_published=True)
+        postings = postings.filter(post__is_published=True)
+
+    stats = documents.aggregate(count=Count("pk"), average_length=Avg("length"))
+    document_count = stats["count"]
+    average_length = stats["average_length"] or 1
+
+    matches = defaultdict(dict)
+    for term, post_id, frequency, positions in postings.values_list(
+        "term", "post_id", "frequency", "positions"
+    ):
+        matches[post_id][term] = (frequency, set(positions))
+
+    # Counted over every document with the term, before the all terms filter
+    document_frequencies = defaultdict(int)
+    for post_terms in matches.values():
+        for term in post_terms:
+            document_frequencies[term] += 1
+
+    # Every term has to match
+    matches = {
+        post_id: post_terms
+        for post_id, post_terms in matches.items()
+        if len(post_terms) == len(terms)
+    }
+
+    lengths = dict(documents.filter(pk__in=matches).values_list("pk", "length"))
+
+    results = []
+    for post_id, post_terms in matches.items():
+        positions = {term: post_terms[term][1] for term in post_terms}
+        if not all(
+            _has_phrase(positions, terms) for terms in phrases if len(terms) > 1
+        ):
+            continue
+
+        length_norm = 1 - B + B * lengths.get(post_id, 0) / average_length
+        score = 0
+        for term, (frequency, _) in post_terms.items():
+            idf = math.log(
+                1
+                + (document_count - document_frequencies[term] + 0.5)
+                / (document_frequencies[term] + 0.5)
+            )
+            score += idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+        results.append((post_id, score))
+
+    results.sort(key=lambda item: (-item[1], -item[0]))
+    return results[:limit] if limit else results
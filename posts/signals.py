@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from common.models import SiteAsset
+from common.versions import POSTS_VERSION, bump_version
+from .models import PostDetail, PostTag
+from .related import (
+    get_tag_neighbours,
+    refresh_related_posts,
+    refresh_related_posts_of_saved_post,
+)
+from .search import index_posts
+
+
+@receiver([post_save, post_delete], sender=PostDetail)
+@receiver([post_save, post_delete], sender=PostTag)
+@receiver(m2m_changed, sender=PostDetail.tags.through)
+def bump_posts_version(sender, **kwargs):
+    bump_version(POSTS_VERSION)
+
+
+## Related posts
+def refresh_neighbours_on_commit(post_ids):
+    """Refresh the related posts of posts sharing a tag with post_ids once committed."""
+    post_ids = set(post_ids)
+    transaction.on_commit(
+        lambda: refresh_related_posts(sorted(get_tag_neighbours(post_ids)))
+    )
+
+
+def refresh_on_commit(post_ids):
+    post_ids = sorted(post_ids)
+    transaction.on_commit(lambda: refresh_related_posts(post_ids))
+
+
+@receiver(post_save, sender=PostDetail)
+def refresh_related_posts_on_save(sender, instance, **kwargs):
+    # Publishing, featuring or dating a post changes its score for its neighbours
+    post_id = instance.pk
+    transaction.on_commit(lambda: refresh_related_posts_of_saved_post(post_id))
+
+
+@receiver(pre_delete, sender=PostDetail)
+def refresh_related_posts_of_deleted_post(sender, instance, **kwargs):
+    # Find the neighbours while the post still has its tags
+    refresh_on_commit(get_tag_neighbours([instance.pk]) - {instance.pk})
+
+
+@receiver(pre_delete, sender=PostTag)
+def refresh_related_posts_of_deleted_tag(sender, instance, **kwargs):
+    post_ids = instance.postdetail_set.values_list("pk", flat=True)
+    refresh_on_commit(get_tag_neighbours(list(post_ids)))
+
+
+@receiver(m2m_changed, sender=PostDetail.tags.through)
+def refresh_related_posts_on_tag_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if reverse:
+        post_ids = pk_set if pk_set is not None else instance.postdetail_set.all()
+        post_ids = [getattr(post, "pk", post) for post in post_ids]
+    else:
+        post_ids = [instance.pk]
+
+    if action in ("pre_remove", "pre_clear"):
+        # Posts only sharing the removed tags have to be found before removal
+        refresh_on_commit(get_tag_neighbours(post_ids))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        refresh_neighbours_on_commit(post_ids)
+
+
+## Search index
+@receiver(post_save, sender=PostDetail)
+def index_saved_post(sender, instance, **kwargs):
+    # Deleting a post deletes its index entries with it
+    post_id = instance.pk
+    transaction.on_commit(lambda: index_posts([post_id]))
+
+
+@receiver([post_save, post_delete], sender=SiteAsset)
+def index_asset_post(sender, instance, **kwargs):
+    # Assets change the rendered content, indexed after it is rendered again
+    post_id = instance.post_id
+    if post_id is not None:
+        transaction.on_commit(lambda: index_posts([post_id]))
@@ -1,51 +1,78 @@
+import hashlib
 import re
 
+from django.conf import settings
+
+from common.utils import LRUCache
+
 
 SUBLINK_DIV = '<div id="{}" class="post-sublink"></div>'
 
+HEADER_RE = re.compile(r"<h([\d]) ?.*?>(.*?)</h\1>")
+
 
 class PostSubLink:
-    def __init__(self, div_id, text, indent=0) -> None:
+    """A header of the post content, with the headers nested under it as children."""
+
+    def __init__(self, div_id, text, level, indent=0) -> None:
         self.div_id = div_id
         self.text = text
+        self.level = level
         self.indent = indent
-        self.indent_range = list(range(indent))
+        self.children = []
 
 
 def parse_sublinks(text):
-    h_re = re.compile(r"<h([\d]) ?.*?>(.*?)</h\1>")
+    """
+    Add an anchor div before every header of text and build the tree of headers.
+
+    A header becomes a child of the closest preceding header with a lower level.
+    Returns the updated text and the list of top level headers.
+    """
+    parts = []
+    sublinks = []
+    # Headers that can still receive children, outermost first
+    open_sublinks = []
     start_pos = 0
-    updated_text = ""
-    sublink_list = []
-    indent = 0
-    last_level = None
 
-    for cnt, match in enumerate(h_re.finditer(text), start=1):
+    for cnt, match in enumerate(HEADER_RE.finditer(text), start=1):
         div_id = f"sub_heading_{cnt}"
-        updated_text += (
-            text[start_pos : match.start()]
-            + SUBLINK_DIV.format(div_id)
-            + text[match.start() : match.end()]
-        )
-
-        try:
-            if last_level is not None and int(match.group(1)) > last_level:
-                indent += 1
-            elif (
-                last_level is not None
-                and int(match.group(1)) < last_level
-                and indent > 0
-            ):
-                indent -= last_level - int(match.group(1))
-                if indent < 0:
-                    indent = 0
-
-            last_level = int(match.group(1))
-        except Exception:
-            pass
-
-        sublink_list.append(PostSubLink(div_id, match.group(2), indent))
+        parts.append(text[start_pos : match.start()])
+        parts.append(SUBLINK_DIV.format(div_id))
+        parts.append(match.group(0))
         start_pos = match.end()
 
-    updated_text += text[start_pos:]
-    return updated_text, sublink_list
+        level = int(match.group(1))
+        while open_sublinks and open_sublinks[-1].level >= level:
+            open_sublinks.pop()
+
+        sublink = PostSubLink(div_id, match.group(2), level, len(open_sublinks))
+        if open_sublinks:
+            open_sublinks[-1].children.append(sublink)
+        else:
+            sublinks.append(sublink)
+        open_sublinks.append(sublink)
+
+    parts.append(text[start_pos:])
+    return "".join(parts), sublinks
+
+
+def iter_sublinks(sublinks):
+    """Yield every header of a sublink tree in document order."""
+    for sublink in sublinks:
+        yield sublink
+        yield from iter_sublinks(sublink.children)
+
+
+_post_sublinks_cache = LRUCache(getattr(settings, "SUBLINK_CACHE_SIZE", 128))
+
+
+def get_post_sublinks(post):
+    """parse_sublinks for the post's content, memoized per post and content."""
+    key = (post.pk, hashlib.sha256(post.content.encode("utf-8")).hexdigest())
+    result = _post_sublinks_cache.get(key)
+    if result is None:
+        result = parse_sublinks(post.content)
+        _post_sublinks_cache.set(key, result)
+
+    return result
@@ -1,8 +1,27 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-from .sublink import parse_sublinks, SUBLINK_DIV
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from common.mixins import ConditionalGetMixin
 
+from .models import PostDetail, PostTag, RelatedPost, SearchPosting
+from .related import (
+    compute_related_posts,
+    refresh_related_posts,
+    refresh_related_posts_of_saved_post,
+)
+from .search import search
+from .sublink import iter_sublinks, parse_sublinks, SUBLINK_DIV
+from .utils import get_related_posts, get_tag_facets
+from .viewcounts import view_counts
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
 class TestSublink(TestCase):
     text = """
         <h3>1. This is a header</h3><h4>2. This is its subheader</h4>
@@ -25,7 +44,8 @@ class TestSublink(TestCase):
     """
 
     def test_parse_sublinks(self):
-        ut, sll = parse_sublinks(self.text)
+        ut, tree = parse_sublinks(self.text)
+        sll = list(iter_sublinks(tree))
 
         id_len = 0
         for sl in sll:
@@ -44,3 +64,406 @@ class TestSublink(TestCase):
 
         self.assertEqual(sll[5].text, "6. TEST")
         self.assertEqual(sll[9].text, "10. subheaders")
+
+    def test_sublink_tree(self):
+        _, tree = parse_sublinks(self.text)
+
+        self.assertEqual(
+            [sl.text for sl in tree],
+            ["1. This is a header", "5. Here is a new header", "6. TEST"],
+        )
+        self.assertEqual(len(tree[0].children), 3)
+        self.assertEqual(
+            [sl.text for sl in tree[2].children],
+            ["7. With", "9, other", "10. subheaders"],
+        )
+        self.assertEqual(tree[2].children[0].children[0].text, "8. some")
+
+    def test_post_detail_lists_sublinks(self):
+        PostDetail.objects.create(
+            permalink="post", heading="Post", content=self.text, is_published=True
+        )
+        response = self.client.get(reverse("post-detail", args=["post"]))
+
+        self.assertContains(response, 'href="#sub_heading_8">8. some</a>')
+        self.assertContains(response, SUBLINK_DIV.format("sub_heading_10"))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class TestPostListView(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def add_posts(self, count):
+        tag, _ = PostTag.objects.get_or_create(label="python")
+        for _ in range(count):
+            post = PostDetail.objects.create(
+                permalink=f"post-{PostDetail.objects.count()}",
+                heading="Post",
+                introduction="<p>Intro</p>",
+                content="{% broken %}",
+                is_published=True,
+            )
+            post.tags.add(tag)
+
+        # Rendering the content would raise, the list must never render it
+        PostDetail.objects.update(requires_rendering=True)
+
+    def count_queries(self):
+        self.client.get(reverse("post-list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("post-list"))
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_posts(self):
+        self.add_posts(15)
+        queries_for_fifteen = self.count_queries()
+
+        self.add_posts(30)
+        self.assertEqual(self.count_queries(), queries_for_fifteen)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60, VIEW_COUNT_FLUSH_INTERVAL=60)
+class TestPageCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counts.flush()
+        self.post = PostDetail.objects.create(
+            permalink="post", heading="Post", content="<p>Post</p>", is_published=True
+        )
+
+    def test_hit_needs_no_query_and_counts_the_view(self):
+        url = reverse("post-detail", args=["post"])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(view_counts.pending(self.post.pk), 2)
+
+    def test_changed_post_purges_pages(self):
+        detail_url = reverse("post-detail", args=["post"])
+        self.client.get(detail_url)
+        self.client.get(reverse("post-list"))
+
+        self.post.heading = "Renamed"
+        self.post.save()
+        self.assertContains(self.client.get(detail_url), "Renamed")
+        self.assertContains(self.client.get(reverse("post-list")), "Renamed")
+
+    def test_params_are_normalised(self):
+        tag = PostTag.objects.create(label="python")
+        self.post.tags.add(tag)
+        url = reverse("post-list")
+        self.client.get(url, {"tags": f"{tag.pk},{tag.pk}", "utm_source": "feed"})
+
+        with self.assertNumQueries(0):
+            self.client.get(url, {"tags": str(tag.pk)})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {"tags": str(tag.pk), "sort": "latest"})
+        self.assertGreater(len(queries), 0)
+
+    def test_viewed_order_and_searches_are_not_cached(self):
+        url = reverse("post-list")
+        for params in ({"sort": "viewed"}, {"q": "post"}):
+            self.client.get(url, params)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url, params)
+            self.assertGreater(len(queries), 0)
+
+    def test_session_gets_a_fresh_page(self):
+        url = reverse("post-detail", args=["post"])
+        self.client.get(url)
+
+        self.client.cookies["sessionid"] = "session"
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertGreater(len(queries), 0)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, VIEW_COUNT_FLUSH_INTERVAL=60)
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counts.flush()
+        self.post = PostDetail.objects.create(
+            permalink="post", heading="Post", content="<p>Post</p>", is_published=True
+        )
+        self.url = reverse("post-detail", args=["post"])
+
+        # Every request falls in the same view count flush interval
+        patcher = mock.patch.object(
+            ConditionalGetMixin, "get_view_count_period", return_value=600.0
+        )
+        self.period = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_modified_only_probes_the_post(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get(
+                self.url, headers={"If-None-Match": response["ETag"]}
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("content", queries[0]["sql"])
+        self.assertEqual(view_counts.pending(self.post.pk), 2)
+
+        not_modified = self.client.get(
+            self.url, headers={"If-Modified-Since": response["Last-Modified"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_change_makes_validators_stale(self):
+        etag = self.client.get(self.url)["ETag"]
+        PostTag.objects.create(label="python")
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_view_counts_make_validators_stale(self):
+        response = self.client.get(self.url)
+        # The next interval, after the post was saved
+        self.period.return_value = time.time() // 60 * 60 + 60
+
+        for headers in (
+            {"If-None-Match": response["ETag"]},
+            {"If-Modified-Since": response["Last-Modified"]},
+        ):
+            self.assertEqual(
+                self.client.get(self.url, headers=headers).status_code, 200
+            )
+
+        # Views written right away change the page on every visit
+        self.period.return_value = None
+        response = self.client.get(self.url, headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_missing_post_is_not_found(self):
+        response = self.client.get(
+            reverse("post-detail", args=["missing"]), headers={"If-None-Match": "*"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+class TestViewCounts(TestCase):
+    def setUp(self):
+        view_counts.flush()
+        self.post = PostDetail.objects.create(
+            permalink="post", heading="Post", content="<p>Post</p>", is_published=True
+        )
+        self.other = PostDetail.objects.create(
+            permalink="other", heading="Other", content="<p>Other</p>"
+        )
+
+    def test_views_are_written_in_one_update(self):
+        for _ in range(3):
+            view_counts.record(self.post.pk)
+        view_counts.record(self.other.pk)
+        self.assertEqual(view_counts.pending(self.post.pk), 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view_counts.flush(), 4)
+
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+        self.assertEqual(self.other.view_count, 1)
+        self.assertEqual(view_counts.pending(self.post.pk), 0)
+
+    def test_detail_view_buffers_views(self):
+        self.client.get(reverse("post-detail", args=["post"]))
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 0)
+        self.assertEqual(view_counts.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 1)
+
+
+class TestTagFacets(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python = PostTag.objects.create(label="python")
+        self.django = PostTag.objects.create(label="django")
+        PostTag.objects.create(label="unused")
+
+        for permalink, is_published in [("a", True), ("b", True), ("c", False)]:
+            post = PostDetail.objects.create(
+                permalink=permalink, heading="Post", is_published=is_published
+            )
+            post.tags.add(self.python)
+        self.draft = PostDetail.objects.get(permalink="c")
+        self.draft.tags.add(self.django)
+
+    def counts(self):
+        return {facet["label"]: facet["count"] for facet in get_tag_facets()}
+
+    def test_counts_published_posts_of_used_tags(self):
+        self.assertEqual(self.counts(), {"python": 2, "django": 0})
+
+        with self.assertNumQueries(0):
+            get_tag_facets()
+
+    def test_publishing_updates_counts(self):
+        self.counts()
+
+        self.draft.is_published = True
+        self.draft.save()
+        self.assertEqual(self.counts(), {"python": 3, "django": 1})
+
+
+class TestRelatedPosts(TestCase):
+    def create_post(self, permalink, tags, is_published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = PostDetail.objects.create(
+                permalink=permalink, heading=permalink, is_published=is_published
+            )
+            post.tags.set(tags)
+
+        return post
+
+    def setUp(self):
+        self.python = PostTag.objects.create(label="python")
+        self.django = PostTag.objects.create(label="django")
+        self.post = self.create_post("post", [self.python, self.django])
+        self.close = self.create_post("close", [self.python, self.django])
+        self.far = self.create_post("far", [self.python])
+        self.create_post("draft", [self.python, self.django], is_published=False)
+        self.create_post("unrelated", [])
+
+    def related_permalinks(self, post):
+        return [related.permalink for related in get_related_posts(post)]
+
+    def test_ranked_by_shared_tags(self):
+        self.assertEqual(self.related_permalinks(self.post), ["close", "far"])
+        # Ties go to the newer post
+        self.assertEqual(self.related_permalinks(self.far), ["close", "post"])
+
+    def test_related_posts_and_tags_in_two_queries(self):
+        with self.assertNumQueries(2):
+            for related in get_related_posts(self.post):
+                list(related.tags.all())
+
+    def test_tag_change_updates_neighbours(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.far.tags.add(self.django)
+            self.close.tags.remove(self.django)
+
+        self.assertEqual(self.related_permalinks(self.post), ["far", "close"])
+
+    def assert_related_posts_are_current(self):
+        stored = {
+            post_id: [
+                (row.related_id, row.score)
+                for row in RelatedPost.objects.filter(post_id=post_id)
+            ]
+            for post_id in PostDetail.objects.values_list("pk", flat=True)
+        }
+        self.assertEqual(stored, compute_related_posts(list(stored)))
+
+    def test_saving_a_post_only_recomputes_its_own_list(self):
+        self.close.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.close.save()
+
+        self.assertEqual(self.related_permalinks(self.post), ["far"])
+        self.assert_related_posts_are_current()
+        self.assertEqual(
+            refresh_related_posts_of_saved_post(self.close.pk), [self.close.pk]
+        )
+
+    @override_settings(RELATED_POSTS={"limit": 1})
+    def test_post_leaving_a_full_list_makes_room(self):
+        refresh_related_posts()
+        self.assertEqual(self.related_permalinks(self.post), ["close"])
+
+        self.close.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.close.save()
+        self.assertEqual(self.related_permalinks(self.post), ["far"])
+        self.assert_related_posts_are_current()
+
+        self.close.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.close.save()
+        self.assertEqual(self.related_permalinks(self.post), ["close"])
+        self.assert_related_posts_are_current()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class TestSearch(TestCase):
+    def create_post(self, permalink, heading, content, is_published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PostDetail.objects.create(
+                permalink=permalink,
+                heading=heading,
+                content=content,
+                is_published=is_published,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.create_post("caching", "Caching in Django", "<p>Django cache tuning</p>")
+        self.create_post("orm", "Django ORM", "<p>Queries and the cache of a café</p>")
+        self.create_post("draft", "Django drafts", "<p>Cache</p>", is_published=False)
+
+    def permalinks(self, query, **kwargs):
+        posts = PostDetail.objects.in_bulk([pk for pk, _ in search(query, **kwargs)])
+        return [posts[pk].permalink for pk, _ in search(query, **kwargs)]
+
+    def test_ranked_by_relevance(self):
+        # The heading weighs more than the content
+        self.assertEqual(self.permalinks("cache django"), ["caching", "orm"])
+        self.assertEqual(self.permalinks("CAFE"), ["orm"])
+        self.assertEqual(self.permalinks("django missing"), [])
+        self.assertEqual(self.permalinks("drafts", published_only=False), ["draft"])
+
+    def test_rare_terms_weigh_more(self):
+        self.create_post("rare", "Note", "<p>common rare rare rare</p>")
+        self.create_post("common", "Note", "<p>common common common rare</p>")
+        for n in range(4):
+            self.create_post(f"filler_{n}", "Note", "<p>common words</p>")
+
+        self.assertEqual(self.permalinks("common rare"), ["rare", "common"])
+
+    def test_phrases(self):
+        self.assertEqual(self.permalinks('"cache tuning"'), ["caching"])
+        self.assertEqual(self.permalinks('"tuning cache"'), [])
+
+    def test_index_follows_changes(self):
+        post = PostDetail.objects.get(permalink="orm")
+        post.content = "<p>Migrations</p>"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+
+        self.assertEqual(self.permalinks("cafe"), [])
+        self.assertEqual(self.permalinks("migrations"), ["orm"])
+
+        post.delete()
+        self.assertFalse(SearchPosting.objects.filter(post_id=post.pk).exists())
+
+    def test_post_list_search(self):
+        response = self.client.get(reverse("post-list"), {"q": "django cache"})
+        self.assertEqual(
+            [post.permalink for post in response.context["post_list"]],
+            ["caching", "orm"],
+        )
+        self.assertEqual(response.context["q_param"], "django cache")
+
+        # An explicit sort replaces the relevance order
+        response = self.client.get(
+            reverse("post-list"), {"q": "django cache", "sort": "latest"}
+        )
+        self.assertEqual(
+            [post.permalink for post in response.context["post_list"]],
+            ["orm", "caching"],
+        )
@@ -1,20 +1,38 @@
-from .models import PostDetail
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import PostDetail, PostTag
 from common.static import SiteStatic
+from common.versions import POSTS_VERSION, get_version
 
 
 def get_related_posts(post: PostDetail, limit: int = 5) -> list[PostDetail]:
-    """Get related posts based on shared tags, excluding the current post."""
-    all_related_posts = PostDetail.objects.filter(tags__in=post.tags.all()).exclude(
-        id=post.id
+    """Get the precomputed related posts of a post, best match first, with their tags."""
+    return list(
+        PostDetail.objects.filter(related_to_links__post=post, is_published=True)
+        .order_by("related_to_links__rank")
+        .defer("content", "rendered_content")
+        .prefetch_related("tags")[:limit]
     )
 
-    related_posts = []
-    related_post_ids = set()
-    for related_post in all_related_posts:
-        if related_post.id not in related_post_ids:
-            related_posts.append(related_post)
-            related_post_ids.add(related_post.id)
-            if len(related_posts) == limit:
-                break
 
-    return related_posts
+def get_tag_facets() -> list[dict]:
+    """Tags used by any post, with the number of published posts for each.
+
+    Counted by the database and cached until a post or tag changes.
+    """
+    key = f"post-tag-facets:{get_version(POSTS_VERSION)}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = list(
+            PostTag.objects.annotate(
+                post_count=Count("postdetail"),
+                count=Count("postdetail", filter=Q(postdetail__is_published=True)),
+            )
+            .filter(post_count__gt=0)
+            .values("id", "label", "color", "bg_color", "count")
+        )
+        cache.set(key, facets, getattr(settings, "POST_TAG_FACETS_CACHE_TIMEOUT", 3600))
+
+    return facets
@@ -0,0 +1,104 @@
+"""
+Buffered post view counting.
+
+Views are counted in memory and written to the database in bulk by a background
+thread every VIEW_COUNT_FLUSH_INTERVAL seconds, so a traffic spike on one post doesn't
+serialise requests on its row lock. Counts that fail to be written are kept for the
+next flush, and whatever is left is flushed when the worker process exits.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, Value, When
+
+from .models import PostDetail
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, "VIEW_COUNT_FLUSH_INTERVAL", 10)
+
+    def record(self, post_id, count=1):
+        """Count views of a post, they are written to the database with the next flush."""
+        with self._lock:
+            self._counts[post_id] += count
+
+        if not self.flush_interval:
+            self.flush()
+        else:
+            self._ensure_flush_thread()
+
+    def pending(self, post_id):
+        """Views of a post that have not been written to the database yet."""
+        with self._lock:
+            return self._counts[post_id]
+
+    def flush(self):
+        """Write the buffered counts with a single UPDATE, returns the number of views."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+
+        counts = +counts
+        if not counts:
+            return 0
+
+        try:
+            PostDetail.objects.filter(pk__in=counts).update(
+                view_count=F("view_count")
+                + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+                    default=Value(0),
+                )
+            )
+        except Exception:
+            # Keep the views, they are written with the next flush
+            with self._lock:
+                self._counts.update(counts)
+            logger.exception("Unable to write %s post views.", sum(counts.values()))
+            return 0
+
+        return sum(counts.values())
+
+    def _ensure_flush_thread(self):
+        # Worker processes forked from a parent need their own thread
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="view-count-flush", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                # The thread lives outside the request cycle that closes connections
+                connection.close()
+
+
+view_counts = ViewCountBuffer()
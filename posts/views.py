@@ -1,19 +1,37 @@
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
 from django.views.generic import DetailView, ListView
-from django.db.models import F
 
 from common.mixins import (
+    ConditionalGetMixin,
+    PageCacheMixin,
     SiteContextMixin,
     SingleObjectContentRendererMixin,
     MultipleObjectContentRendererMixin,
+    normalise_choice,
+    normalise_id_list,
+    normalise_page,
 )
-from common.models import SiteAsset
-from .models import PostDetail, PostTag
-from .sublink import parse_sublinks
-from .utils import get_related_posts
-
-
-class PostDetailView(DetailView, SiteContextMixin, SingleObjectContentRendererMixin):
+from common.versions import POSTS_VERSION, SITE_VERSION
+from .models import PostDetail
+from .search import normalise_query, search
+from .sublink import get_post_sublinks
+from .utils import get_related_posts, get_tag_facets
+from .viewcounts import view_counts
+
+
+class PostDetailView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    DetailView,
+    SiteContextMixin,
+    SingleObjectContentRendererMixin,
+):
     model = PostDetail
+    content_versions = [SITE_VERSION, POSTS_VERSION]
+    shows_view_counts = True
+    # Off when the page is rendered for something other than a visit
+    record_views = True
 
     slug_field = "permalink"
     slug_url_kwarg = "permalink"
@@ -31,24 +49,9 @@ class PostDetailView(DetailView, SiteContextMixin, SingleObjectContentRendererMi
                 "posts/prism-tn.js",
             ]
         )
-        extras.extend(
-            [
-                asset.file.url
-                for asset in SiteAsset.objects.filter(
-                    post=self.object, is_static=True, is_active=True
-                )
-            ]
-        )
+        extras.extend(self.get_asset_resolver().get_static_urls([self.object]))
         return extras
 
-    def get_content_context_data(self, obj):
-        context = super().get_content_context_data(obj)
-        for asset in SiteAsset.objects.filter(
-            post=obj, is_static=False, is_active=True
-        ):
-            context[asset.key] = asset.file
-        return context
-
     def get_queryset(self):
         return super().get_queryset().prefetch_related("tags")
 
@@ -56,7 +59,7 @@ class PostDetailView(DetailView, SiteContextMixin, SingleObjectContentRendererMi
         context = super().get_context_data(**kwargs)
         obj = self.object
         if obj.include_sublinks:
-            content, sublinks = parse_sublinks(obj.content)
+            content, sublinks = get_post_sublinks(obj)
             obj.content = content
             context["sublinks"] = sublinks
 
@@ -67,36 +70,51 @@ class PostDetailView(DetailView, SiteContextMixin, SingleObjectContentRendererMi
 
     def get(self, request, *args, **kwargs):
         response = super().get(request, *args, **kwargs)
-        # Increment view count using F expression to avoid race conditions
-        PostDetail.objects.filter(pk=self.object.pk).update(
-            view_count=F("view_count") + 1
-        )
+        # Buffered and written in bulk, see posts.viewcounts
+        if self.record_views:
+            view_counts.record(self.object.pk)
         return response
 
+    def get_page_cache_data(self):
+        return self.object.pk
 
-class PostListView(ListView, SiteContextMixin, MultipleObjectContentRendererMixin):
+    def cached_view(self, post_id):
+        # Cached pages are still viewed
+        if self.record_views:
+            view_counts.record(post_id)
+
+
+class PostListView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    ListView,
+    SiteContextMixin,
+    MultipleObjectContentRendererMixin,
+):
     model = PostDetail
+    content_versions = [SITE_VERSION, POSTS_VERSION]
+    shows_view_counts = True
+    content_params = {
+        "page": normalise_page,
+        "sort": normalise_choice("featured", "latest", "oldest", "viewed"),
+        "tags": normalise_id_list,
+        "q": normalise_query,
+    }
     template_name = "posts/post-list.html"
     extra_statics = ["posts/post-list.css", "posts/post-list.js"]
     context_object_name = "post_list"
     paginate_by = 12
+    # The list only shows introductions, the content is never displayed
+    render_object_content = False
+
+    def is_page_cacheable(self, request):
+        # The viewed order changes without a content change, and every distinct
+        # search would take its own cache entry
+        return request.GET.get("sort") != "viewed" and not request.GET.get("q")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["tag_list"] = [
-            {
-                "id": pt.id,
-                "label": pt.label,
-                "color": pt.color,
-                "bg_color": pt.bg_color,
-                "count": len(
-                    [pd.id for pd in pt.postdetail_set.all() if pd.is_published]
-                ),
-            }
-            for pt in PostTag.objects.prefetch_related("postdetail_set")
-            .filter(postdetail__isnull=False)
-            .distinct()
-        ]
+        context["tag_list"] = get_tag_facets()
         context["sort_list"] = ["featured", "latest", "oldest", "viewed"]
 
         sort_param = self.request.GET.get("sort")
@@ -105,14 +123,27 @@ class PostListView(ListView, SiteContextMixin, MultipleObjectContentRendererMixi
         tags_param = self.request.GET.get("tags")
         if tags_param:
             context["tags_param"] = str(tags_param).split(",")
+        q_param = self.request.GET.get("q")
+        if q_param:
+            context["q_param"] = q_param
 
         return context
 
     def get_queryset(self):
-        qs = super().get_queryset().filter(is_published=True)
+        qs = (
+            super()
+            .get_queryset()
+            .filter(is_published=True)
+            .defer("content", "rendered_content")
+            .prefetch_related("tags")
+        )
 
         tags_param = self.request.GET.get("tags")
         sort_param = self.request.GET.get("sort")
+        q_param = self.request.GET.get("q")
+
+        if q_param:
+            qs = self.filter_search(qs, q_param, ordered=not sort_param)
 
         if not any([tags_param, sort_param]):
             return qs
@@ -127,5 +158,21 @@ class PostListView(ListView, SiteContextMixin, MultipleObjectContentRendererMixi
 
         filters = {"tags__id__in": str(tags_param).split(",")} if tags_param else {}
 
-        qs = qs.filter(**filters).order_by(*order)
+        qs = qs.filter(**filters)
+        if sort_param or not q_param:
+            qs = qs.order_by(*order)
+        return qs
+
+    def filter_search(self, qs, query, ordered):
+        """Keep the posts matching the query, the most relevant first when ordered."""
+        post_ids = [
+            post_id for post_id, _ in search(query, limit=settings.SEARCH_MAX_RESULTS)
+        ]
+        qs = qs.filter(pk__in=post_ids)
+        if ordered:
+            relevance = Case(
+                *[When(pk=post_id, then=rank) for rank, post_id in enumerate(post_ids)],
+                output_field=IntegerField(),
+            )
+            qs = qs.order_by(relevance)
         return qs